@@ -3,7 +3,7 @@ This module is responsible for invoke the function in model and return the data
 import pandas as pd
 from matplotlib.figure import Figure
 from pandas import DataFrame
-from analysis_model import Analysis
+from analysis_model import Analysis, SEARCH_LIMIT, SCATTER_THRESHOLD, SCATTER_LARGE_MODE, PIE_OTHER_THRESHOLD
 
 
 class AnalysisController:
@@ -12,11 +12,11 @@ class AnalysisController:
         self.__model = Analysis(csv_name)
 
     def get_df(self) -> DataFrame:
-        """ Return copy of dataframe"""
-        return self.__model.df.df.copy()
+        """ Return copy-on-write view of dataframe"""
+        return self.__model.df.df.copy(deep=False)
 
     def get_raw(self):
-        """ Return the copy of raw dataframe """
+        """ Return the copy-on-write view of raw dataframe """
         return self.__model.df.get_raw()
 
     def reset_df(self):
@@ -58,6 +58,14 @@ class AnalysisController:
         """
         self.__model.apply(target_column, function, axis)
 
+    def derive(self, target_column: str, expression=None) -> None:
+        """ Add derived column computed with vectorized column operations
+            Example of expression: 'Positive - Negative', lambda df: df['Price'] * 2
+        :param target_column: name of the derived column ('Rating', 'Primary Genres' are predefined)
+        :param expression: function of dataframe or DataFrame.eval expression string (None for predefined)
+        """
+        self.__model.derive(target_column, expression)
+
     def filter(self, column: str, expression: str) -> None:
         """ Filter values in column based on given expression
             Example of expression: '>= 0', '< 1'
@@ -66,11 +74,35 @@ class AnalysisController:
         """
         self.__model.filter(column, expression)
 
-    def search(self, query: str) -> pd.DataFrame:
-        """ Search the data inside entire dataframe, by query
+    def filter_all(self, conditions: list) -> None:
+        """ Filter values in dataframe with all given conditions at once
+            Example of condition: ('Price', '>=', '10'), ('Genres', 'contains', 'Action'), 'Peak CCU > 0'
+        :param conditions: list of (column, operator, value) tuples or condition strings
+        """
+        self.__model.filter_all(conditions)
+
+    def load_filtered(self, name: str, conditions: list) -> tuple:
+        """ Load dataframe by name (raw data if not exist) and filter it with all conditions (cached)
+        :param name: name of the saved dataframe
+        :param conditions: list of (column, operator, value) tuples or condition strings
+        :return: key of the filtered dataframe (see get_histogram)
+        """
+        return self.__model.load_filtered(name, conditions)
+
+    def get_statistics(self, df: DataFrame, columns: list, key=None) -> dict:
+        """ Calculate the descriptive statistics of the columns (cached by key and column, see load_filtered)"""
+        return self.__model.get_statistics(df, columns, key)
+
+    def get_histogram(self, df: DataFrame, column: str, key=None, bins: int = None) -> dict:
+        """ Calculate the histogram counts and bin edges of the column (quantile summary cached by key)"""
+        return self.__model.get_histogram(df, column, key, bins)
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> pd.DataFrame:
+        """ Search the data inside entire dataframe, by query (literal text, not regex)
         :param query: the query to search (AppID, Name)
+        :param limit: maximum number of results (ranked by relevance)
         :return DataFrame: dataframe of search results"""
-        return self.__model.search(query)
+        return self.__model.search(query, limit)
 
     def to_list(self, column: str):
         """ Converts data in specified columns to list of strings """
@@ -87,6 +119,16 @@ class AnalysisController:
     def get_picture(self, appid: str):
         return self.__model.get_image(appid)
 
+    def prefetch_pictures(self, appids: list) -> None:
+        """ Load the pictures of the apps in background (cached for get_picture)"""
+        self.__model.prefetch_images(appids)
+
+    def shutdown(self) -> list:
+        """ Stop the background work of the model
+        :return: list of the errors of the saved dataframes that could not be written
+        """
+        return self.__model.shutdown()
+
     def get_specific(self, appid: str) -> pd.DataFrame:
         """ return dictionary contains specific information about the given game
         :param appid: the appid of video game
@@ -119,13 +161,21 @@ class AnalysisController:
         self.__model.filter_str(col, filter_str)
 
     def save_all(self) -> None:
-        """ save all dataframe to csv file in saved directory """
+        """ save the changed dataframes to saved directory (written in background) """
         self.__model.df.save_all_df()
 
     def get_unique_genres(self) -> list:
         """ return list of unique genres inside dataframe"""
         return self.__model.get_all_genres()
 
+    def get_genre_counts(self, df: DataFrame = None) -> pd.Series:
+        """ return number of games in each genre of the dataframe (raw data if None)"""
+        return self.__model.get_genre_counts(df)
+
+    def get_dashboard(self, name: str):
+        """ return the information page artifact by name, compute and cache it if not exist"""
+        return self.__model.get_dashboard(name)
+
     def visit_steamdb(self, appid: str = '') -> None:
         """ visit steamdb.info site of specified app"""
         self.__model.open_steamdb(appid)
@@ -135,21 +185,47 @@ class AnalysisController:
         self.__model.open_steam(appid)
 
     def plot_histogram(self, df: DataFrame, x_column: str, x_label: str, y_label: str,
-                       title: str = 'Histogram', bins: int = None) -> Figure:
-        """ Plot histogram according to input """
-        return self.__model.plot_histogram(df, x_column, x_label, y_label, title, bins)
+                       title: str = 'Histogram', bins: int = None, fig: Figure = None) -> Figure:
+        """ Plot histogram according to input (into fig if given) """
+        return self.__model.plot_histogram(df, x_column, x_label, y_label, title, bins, fig)
+
+    def plot_histogram_counts(self, counts, edges, x_label: str, y_label: str,
+                              title: str = 'Histogram', fig: Figure = None) -> Figure:
+        """ Plot histogram from precomputed counts and bin edges (into fig if given) """
+        return self.__model.plot_histogram_counts(counts, edges, x_label, y_label, title, fig)
 
     def plot_scatter(self, df: DataFrame, x_column: str, y_column: str, x_label: str, y_label: str,
-                     title: str = 'Scatter Plot') -> Figure:
-        """ Plot the scatter plot of the data """
-        return self.__model.plot_scatter(df, x_column, y_column, x_label, y_label, title)
+                     title: str = 'Scatter Plot', threshold: int = SCATTER_THRESHOLD,
+                     large_mode: str = SCATTER_LARGE_MODE, fig: Figure = None) -> Figure:
+        """ Plot the scatter plot of the data (into fig if given)
+        :param threshold: maximum number of points plotted as they are
+        :param large_mode: 'hexbin' (density) or 'sample' (stratified sample) for more points than threshold
+        """
+        return self.__model.plot_scatter(df, x_column, y_column, x_label, y_label, title, threshold, large_mode,
+                                         fig)
 
     def plot_line(self, df: DataFrame, x_column: str, y_column: str, x_label: str, y_label: str,
-                  title: str = 'Line Plot') -> Figure:
-        """ Plot the line plot of the data """
-        return self.__model.plot_line(df, x_column, y_column, x_label, y_label, title)
-
-    def plot_pie(self, df: DataFrame, x_column: str,
-                 title: str = 'Pie Plot') -> Figure:
-        """ Plot the pie plot of the data """
-        return self.__model.plot_pie(df, x_column, title)
+                  title: str = 'Line Plot', fig: Figure = None) -> Figure:
+        """ Plot the line plot of the data (into fig if given) """
+        return self.__model.plot_line(df, x_column, y_column, x_label, y_label, title, fig)
+
+    def plot_pie(self, df: DataFrame, x_column: str, title: str = 'Pie Plot', fig: Figure = None,
+                 threshold: float = PIE_OTHER_THRESHOLD, top: int = None) -> Figure:
+        """ Plot the pie plot of the data (into fig if given)
+        :param threshold: values below this share of the total are combined to "Other"
+        :param top: keep only the top most frequent values and combine the rest to "Other"
+        """
+        return self.__model.plot_pie(df, x_column, title, fig, threshold, top)
+
+    def plot_pie_counts(self, counts: pd.Series, title: str = 'Pie Plot', fig: Figure = None,
+                        threshold: float = PIE_OTHER_THRESHOLD, top: int = None) -> Figure:
+        """ Plot the pie plot of precomputed counts (into fig if given) """
+        return self.__model.plot_pie_counts(counts, title, fig, threshold, top)
+
+    def category_counts(self, data: pd.Series, threshold: float = PIE_OTHER_THRESHOLD, top: int = None) -> pd.Series:
+        """ Count each value of the categorical data, small categories are combined to "Other" """
+        return self.__model.category_counts(data, threshold, top)
+
+    def get_timings(self) -> dict:
+        """ Get the time of the last run of the timed operations in seconds"""
+        return self.__model.get_timings()
@@ -1,25 +1,38 @@
 """ GUI module for analysis application
 this module used for GUI part of the application"""
 
-import threading
-from queue import Queue
+import time
+import logging
 import tkinter as tk
 import tkinter.messagebox
 from tkinter import ttk, font
 from PIL import ImageTk
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from analysis_controller import AnalysisController
+from figure_pool import FigurePool
+from task_scheduler import TaskScheduler
+from virtual_treeview import VirtualTreeview
 plt.switch_backend('tkAgg')
+logger = logging.getLogger(__name__)
+
+SEARCH_DELAY = 250  # ms of idle typing before the live search runs
+PAGE_WARM_ORDER = ['Information', 'Single Data', 'Explore']  # order of building the pages not visited yet
+PAGE_WARM_DELAY = 300  # ms between building the pages not visited yet
+IMAGE_PREFETCH = 10  # number of rows around the selection (and top search results) to prefetch images
 
 
 class AnalysisGUI(tk.Tk):
     """ GUI class for analysis application"""
 
     def __init__(self, csv_name):
+        start_time = time.perf_counter()
         super().__init__()
+        self.__start_time = start_time
+        self.startup_time = None
         # Controller
         self.analysis = AnalysisController(csv_name)
+        self.scheduler = TaskScheduler(self)
+        self.figures = FigurePool()
         # Main GUI
         self.title('Steam Game Market Analysis')
         self.notebook = ttk.Notebook(self)
@@ -28,12 +41,19 @@ class AnalysisGUI(tk.Tk):
         for i in page_name:
             temp = tk.Frame(self.notebook)
             self.pages[i] = temp
+        # Pages are built on the first visit (or when the application is idle)
+        self.__page_builder = {'Information': self.__init_information,
+                               'Explore': self.__init_explore,
+                               'Single Data': self.__init_single_data}
+        self.__built_pages = set()
 
         # Explore Pages Variable
         self.__explore_comp = {}
 
         # Single Data Pages Variable
         self.__query = tk.StringVar()
+        self.__searched = ''
+        self.__search_job = None
         self.__table = None
         self.__detail_comp = {}
 
@@ -45,16 +65,15 @@ class AnalysisGUI(tk.Tk):
         self.defaultFont = font.nametofont('TkDefaultFont')
         self.defaultFont.configure(size=12)
 
-        self.__init_explore()
-        self.__init_single_data()
-        self.__init_information()
-
         for i in self.pages:
             page = self.pages[i]
             page.pack(fill=tk.BOTH, expand=True)
             self.notebook.add(page, text=i)
         self.notebook.pack(fill=tk.BOTH, expand=True)
         self.notebook.bind('<<NotebookTabChanged>>', self.handle_tab_change)
+        self.build_page(self.notebook.tab(self.notebook.select(), 'text'))
+        self.after_idle(self.__report_startup)
+        self.after(PAGE_WARM_DELAY, self.__warm_pages)
 
         # Set initial screen size to prevent the window to be larger than screen
         width = self.winfo_screenwidth()
@@ -70,94 +89,92 @@ class AnalysisGUI(tk.Tk):
 
         self.protocol('WM_DELETE_WINDOW', self.exit)
 
+    def build_page(self, name: str) -> None:
+        """ Build the notebook page component if it is not built yet"""
+        if name in self.__built_pages:
+            return
+        self.__built_pages.add(name)
+        self.__page_builder[name]()
+
+    def __warm_pages(self) -> None:
+        """ Build one page that is not visited yet when the application is idle, then schedule the next one"""
+        for name in PAGE_WARM_ORDER:
+            if name not in self.__built_pages:
+                self.after_idle(self.build_page, name)
+                self.after(PAGE_WARM_DELAY, self.__warm_pages)
+                return
+
+    def __report_startup(self) -> None:
+        """ Record the time until the first window is interactive (reported as info log)"""
+        self.startup_time = time.perf_counter() - self.__start_time
+        logger.info("Window interactive after %.2f s", self.startup_time)
+
     def __init_information(self):
         """ Initialise the information page component"""
         root = self.pages['Information']
         descriptive_frame = tk.LabelFrame(root, text='Descriptive Statistic', font='32')
 
-        # Distribution of Games Price (histogram)
-        price_fig = self.analysis.plot_histogram(self.analysis.get_df(), 'Price',
-                                                 'Price', 'Number of video games',
-                                                 'Distribution of Video Games Prices')
-        dist_price_cv = FigureCanvasTkAgg(price_fig, root)
-        dist_price_cv.draw()
-        dist_price_cv.get_tk_widget().grid(sticky=tk.NSEW, column=0, row=0)
-
-        # Descriptive Statistic of Rating
-        price_desc = self.get_descriptive_statistic(descriptive_frame, 'Price')
-        price_desc.grid(sticky=tk.NSEW, column=0, row=0)
-
-        # Game release each year (line graph)
-        self.analysis.to_datetime()
-        temp_df = self.analysis.count_time('YE')
-        price_y_fig = self.analysis.plot_line(temp_df, "Release date", "Name",
-                                              'Release Date', "Number of Video Games", "Game release each Year")
-        price_y_cv = FigureCanvasTkAgg(price_y_fig, root)
-        price_y_cv.draw()
-        price_y_cv.get_tk_widget().grid(sticky=tk.NSEW, column=1, row=0)
-
-        # Scatter plot of Price and Rating (Scatter)
-        def filter_df():
-            self.analysis.reset_df()
-            self.analysis.filter('Positive', '!= 0')
-            self.analysis.filter('Negative', '!= 0')
-            self.analysis.apply('Rating', lambda x: x['Positive'] / (x['Positive'] + x['Negative']) * 100,
-                                axis=1)
-
-        def filter_data():
-            progress_bar = ttk.Progressbar(root, orient=tk.VERTICAL, mode='indeterminate')
-            progress_bar.grid(sticky=tk.NSEW, row=2, column=0)
-            thread = threading.Thread(target=filter_df)
-            thread.start()
+        def show_figure(fig, column, row):
+            """ Draw the figure into the information page grid"""
+            self.figures.show(f'information {column} {row}', fig, root, column=column, row=row)
+
+        # name -> (parent frame, column, row, function to render the artifact (background thread),
+        #          function to draw the rendered artifact (tkinter thread))
+        items = {
+            # Distribution of Games Price (histogram)
+            'price histogram': (root, 0, 0, lambda data: self.analysis.plot_histogram_counts(
+                data['counts'], data['edges'], 'Price', 'Number of video games', 'Distribution of Video Games Prices'),
+                lambda fig: show_figure(fig, 0, 0)),
+            # Descriptive Statistic of Price
+            'price statistic': (descriptive_frame, 0, 0, None, lambda data: self.get_descriptive_statistic(
+                descriptive_frame, data, 'Price').grid(sticky=tk.NSEW, column=0, row=0)),
+            # Game release each year (line graph)
+            'yearly release': (root, 1, 0, lambda data: self.analysis.plot_line(
+                data, "Release date", "Name", 'Release Date', "Number of Video Games", "Game release each Year"),
+                lambda fig: show_figure(fig, 1, 0)),
+            # Scatter plot of Price and Rating (Scatter)
+            'price rating scatter': (root, 2, 0, lambda data: self.analysis.plot_scatter(
+                data, "Price", "Rating", "Price", "Rating", "Scatter of Price and Rating"),
+                lambda fig: show_figure(fig, 2, 0)),
+            # Rating Dist
+            'rating histogram': (root, 1, 1, lambda data: self.analysis.plot_histogram_counts(
+                data['counts'], data['edges'], 'Rating', 'Number of Video Game', 'Distribution of Game Rating'),
+                lambda fig: show_figure(fig, 1, 1)),
+            # Descriptive Statistic of Rating
+            'rating statistic': (descriptive_frame, 1, 0, None, lambda data: self.get_descriptive_statistic(
+                descriptive_frame, data, 'Rating').grid(sticky=tk.NSEW, column=1, row=0)),
+            # Ratio of Game Genres (Pie Charts)
+            'genre pie': (root, 0, 1, lambda data: self.analysis.plot_pie_counts(
+                data, "Ratio of each primary genres"),
+                lambda fig: show_figure(fig, 0, 1)),
+        }
+
+        # Load (or compute) the artifacts and render the charts concurrently in background,
+        # figures are drawn without pyplot so each chart is built in its own worker thread
+        for name, (parent, column, row, render, show) in items.items():
+            progress_bar = ttk.Progressbar(parent, orient=tk.VERTICAL, mode='indeterminate')
+            progress_bar.grid(sticky=tk.NSEW, column=column, row=row)
             progress_bar.start()
-            while thread.is_alive():
-                self.update()
-            progress_bar.stop()
-            progress_bar.grid_forget()
 
-        filter_data()
-        temp_df = self.analysis.get_df()
-        scatter_fig = self.analysis.plot_scatter(temp_df, "Price", "Rating",
-                                                 "Price", "Rating", f"Scatter of Price and Rating")
-        scatter_cv = FigureCanvasTkAgg(scatter_fig, root)
-        scatter_cv.draw()
-        scatter_cv.get_tk_widget().grid(sticky=tk.NSEW, column=2, row=0)
-
-        # Rating Dist
-        rate_dist_fig = self.analysis.plot_histogram(self.analysis.get_df(), 'Rating', 'Rating',
-                                                     'Number of Video Game', 'Distribution of Game Rating')
-        rate_dist_cv = FigureCanvasTkAgg(rate_dist_fig, root)
-        rate_dist_cv.draw()
-        rate_dist_cv.get_tk_widget().grid(sticky=tk.NSEW, column=1, row=1)
-
-        # Descriptive Statistic of Rating
-        rating_desc = self.get_descriptive_statistic(descriptive_frame, "Rating")
-        rating_desc.grid(sticky=tk.NSEW, column=1, row=0)
-
-        # Ratio of Game Genres (Pie Charts)
-        def filter_df2():
-            self.analysis.reset_df()
-            self.analysis.to_list('Genres')
-            self.analysis.apply('Primary Genres', lambda x: x['Genres'][0], axis=1)
-
-        def filter_data():
-            progress_bar = ttk.Progressbar(root, orient=tk.VERTICAL, mode='indeterminate')
-            progress_bar.grid(sticky=tk.NSEW, row=0, column=1)
-            thread = threading.Thread(target=filter_df2)
-            thread.start()
-            progress_bar.start()
-            while thread.is_alive():
-                self.update()
-            progress_bar.stop()
-            progress_bar.grid_forget()
+            def render_artifact(name=name, render=render):
+                """ Thread Worker for getting the artifact and rendering its figure"""
+                data = self.analysis.get_dashboard(name)
+                return data if render is None else render(data)
 
-        filter_data()
+            def show_rendered(result, show=show, progress_bar=progress_bar):
+                """ Draw the artifact after it is rendered"""
+                progress_bar.stop()
+                progress_bar.destroy()
+                show(result)
 
-        pie_fig = self.analysis.plot_pie(self.analysis.get_df(), "Primary Genres",
-                                         "Ratio of each primary genres")
-        pie_cv = FigureCanvasTkAgg(pie_fig, root)
-        pie_cv.draw()
-        pie_cv.get_tk_widget().grid(sticky=tk.NSEW, column=0, row=1)
+            def show_error(error, name=name, parent=parent, column=column, row=row, progress_bar=progress_bar):
+                """ Show the error in place of the artifact when it can not be computed or rendered"""
+                progress_bar.stop()
+                progress_bar.destroy()
+                tk.Label(parent, text=f"{name.capitalize()} not available\n{error}", wraplength=300).grid(
+                    sticky=tk.NSEW, column=column, row=row)
+
+            self.scheduler.submit('information ' + name, render_artifact, show_rendered, show_error)
 
         descriptive_frame.grid(sticky=tk.NSEW, column=2, row=1)
         descriptive_frame.columnconfigure(0, weight=1)
@@ -260,11 +277,7 @@ class AnalysisGUI(tk.Tk):
         def extract_tree():
             ls = []
             for line in tree_view.get_children():
-                t = ""
-                for value in tree_view.item(line)["values"]:
-                    t += str(value).replace(' ', '_') + ' '
-                t.strip()
-                ls.append(t)
+                ls.append(tuple(str(value) for value in tree_view.item(line)["values"]))
             return ls
 
         visualize_button = ttk.Button(data_frame, text='Visualize',
@@ -292,13 +305,21 @@ class AnalysisGUI(tk.Tk):
             filter_data.columnconfigure(i, weight=1)
         filter_data.rowconfigure(2, weight=10)
 
+        # Descriptive statistic of the plotted columns of the filtered data (updated on visualize)
+        statistic_frame = ttk.LabelFrame(filter_area, text='Statistic')
+        statistic_label = tk.Label(statistic_frame, text='', anchor='w', justify='left')
+        statistic_label.pack(side=tk.TOP, expand=True, fill=tk.X)
+        self.__explore_comp['statistic'] = statistic_label
+
         filter_data.grid(sticky=tk.NSEW, padx=5, pady=5, column=0, row=1, columnspan=2)
         data_frame.grid(sticky=tk.NSEW, padx=5, pady=5, column=0, row=2, columnspan=2)
+        statistic_frame.grid(sticky=tk.NSEW, padx=5, pady=5, column=0, row=3, columnspan=2)
 
         filter_area.grid(sticky=tk.NSEW, padx=5, pady=5, column=1, row=0)
 
         filter_area.rowconfigure(1, weight=10)
         filter_area.rowconfigure(2, weight=1)
+        filter_area.rowconfigure(3, weight=1)
         filter_area.columnconfigure(0, weight=1)
         filter_area.columnconfigure(1, weight=5)
 
@@ -368,78 +389,81 @@ class AnalysisGUI(tk.Tk):
     def handle_visualize(self, x: str = 'Price', y: str = 'Positive',
                          graph_type: str = 'Histogram', filter_list: list = None):
         """ Handle the visualization of the data (Button Pressed)"""
-        try:
-            fig = self.__explore_comp['figure']
-            fig.get_tk_widget().grid_forget()
-            plt.close(fig.figure)
-            del fig
-        except KeyError:
-            pass
-        try:
-            self.analysis.load_df(self.__explore_comp['df'].get())
-        except KeyError:
-            self.analysis.reset_df()
-
+        if graph_type == 'Scatter' and x == y:
+            tk.messagebox.showinfo("Invalid XY", "X and Y must be different")
+            return
+        df_name = self.__explore_comp['df'].get()
         root = self.__explore_comp['plot']
 
         def filter_df():
-            """ Thread Worker for filtering data"""
-            for i in filter_list:
-                i = i.split(' ')
-                expression = i[1] + " " + i[2].replace('_', ' ')
-                if i[1] == 'contains':
-                    self.analysis.filter_str(i[0], str(i[2].replace('_', ' ')))
-                else:
-                    self.analysis.filter(i[0].replace('_', ' '), expression)
-
-        def filter_data():
-            """ Tracking of the data filtering progress (long running task)"""
-            progress_bar = ttk.Progressbar(root, orient=tk.VERTICAL,
-                                           mode='indeterminate')
-            progress_bar.grid(sticky=tk.NSEW, row=0, column=0)
-            thread = threading.Thread(target=filter_df)
-            thread.start()
-            progress_bar.start()
-            while thread.is_alive():
-                self.update()
+            """ Thread Worker for filtering data, return the data to plot and statistic of the plotted columns"""
+            key = self.analysis.load_filtered(df_name, filter_list or [])
+            df = self.analysis.get_df()
+            plotted = {'Scatter': [x, y], 'Line': [y]}.get(graph_type, [x])
+            numeric = self.analysis.get_num_column()
+            statistic = self.analysis.get_statistics(df, [i for i in plotted if i in numeric], key)
+            if graph_type == 'Histogram':
+                return self.analysis.get_histogram(df, x, key), statistic
+            if graph_type == 'Line':
+                if x == 'count':
+                    return self.analysis.count_time(), statistic
+                return self.analysis.mean_time(y), statistic
+            return df, statistic
+
+        def show_plot(result):
+            """ Plot the graph of the filtered data (histogram counts for Histogram)"""
             progress_bar.stop()
             progress_bar.grid_forget()
+            data, statistic = result
+            self.show_statistic(statistic)
+            # Redraw into the figure of the previous plot (created on the first plot)
+            fig = self.figures.get_figure('explore')
+            match graph_type:
+                case 'Histogram':
+                    title = 'Distribution of ' + x
+                    plot = self.analysis.plot_histogram_counts(data['counts'], data['edges'], x, 'frequency', title,
+                                                               fig=fig)
+                case "Scatter":
+                    title = 'Scatter plot of ' + x + ' and ' + y
+                    plot = self.analysis.plot_scatter(data, x, y, x, y, title, fig=fig)
+                case "Pie":
+                    title = 'Pie plot of ' + x
+                    if x == 'Genres':
+                        plot = self.analysis.plot_pie_counts(self.analysis.get_genre_counts(data), title=title,
+                                                             fig=fig)
+                    else:
+                        plot = self.analysis.plot_pie(data, x, title=title, fig=fig)
+                case "Line":
+                    x_col = 'Release date'
+                    if x == 'count':
+                        title = "Number of " + y + ' Each year'
+                        plot = self.analysis.plot_line(data, x_col, 'Name', x_col, y, title=title, fig=fig)
+                    else:
+                        title = "Average of " + y + ' Each year'
+                        plot = self.analysis.plot_line(data, x_col, y, x_col, y, title=title, fig=fig)
+            self.figures.show('explore', plot, root, column=0, row=0)
+
+        def show_error(error):
+            """ Show the error of the filtering"""
+            progress_bar.stop()
+            progress_bar.grid_forget()
+            tk.messagebox.showinfo("Invalid Filter", str(error))
 
-        filter_data()
-
-        df = self.analysis.get_df()
-        match graph_type:
-            case 'Histogram':
-                title = 'Distribution of ' + x
-                plot = self.analysis.plot_histogram(df, x, x, 'frequency', title)
-            case "Scatter":
-                if x == y:
-                    tk.messagebox.showinfo("Invalid XY", "X and Y must be different")
-                    return
-                title = 'Scatter plot of ' + x + ' and ' + y
-                plot = self.analysis.plot_scatter(df, x, y, x, y, title)
-            case "Pie":
-                title = 'Pie plot of ' + x
-                plot = self.analysis.plot_pie(df, x, title=title)
-            case "Line":
-                x_col = 'Release date'
-                if x == 'count':
-                    title = "Number of " + y + ' Each year'
-                    df = self.analysis.count_time()
-                    plot = self.analysis.plot_line(df, x_col, 'Name', x_col, y, title=title)
-                elif x == 'average':
-                    title = "Average of " + y + ' Each year'
-                    df = self.analysis.mean_time(y)
-                    plot = self.analysis.plot_line(df, x_col, y, x_col, y, title=title)
-        figure = FigureCanvasTkAgg(plot, root)
-        figure.draw()
-        figure.get_tk_widget().grid(sticky=tk.NSEW, column=0, row=0)
-        self.__explore_comp['figure'] = figure
+        # Tracking of the data filtering progress (long running task), replace the older visualize request
+        progress_bar = self.__explore_comp.get('progress')
+        if progress_bar is None:
+            progress_bar = ttk.Progressbar(root, orient=tk.VERTICAL, mode='indeterminate')
+            self.__explore_comp['progress'] = progress_bar
+        progress_bar.grid(sticky=tk.NSEW, row=0, column=0)
+        progress_bar.lift()
+        progress_bar.start()
+        self.scheduler.submit('visualize', filter_df, show_plot, show_error, serial=True)
 
     def handle_tab_change(self, event: tk.Event):
         """ Handle the event of tab changing (tkinter notebook) """
-        i = self.notebook.index(self.notebook.select())
-        if i == 1:
+        name = self.notebook.tab(self.notebook.select(), 'text')
+        self.build_page(name)
+        if name == 'Explore':
             # Update dataframe combobox each time the user select the explore tabs
             combobox = self.__explore_comp['df']
             self.load_dataframe_name(combobox)
@@ -453,7 +477,7 @@ class AnalysisGUI(tk.Tk):
 
     def select_filter(self, selected):
         """ Change the list for filter condition corresponding to selected attributes"""
-        self.analysis.reset_df()
+        self.scheduler.cancel('genres')
         full_dict = self.analysis.get_filter_columns()
         cbb = self.__explore_comp['condition1']
         cbb['values'] = []
@@ -462,50 +486,28 @@ class AnalysisGUI(tk.Tk):
             cbb['values'] = ['<=', '>=', '<', '>', '==', '!=']
             cbb.current(0)
             cbb = self.__explore_comp['condition2']
-            cbb['values'] = self.analysis.get_df()[selected].unique().tolist()
+            cbb['values'] = self.analysis.get_raw()[selected].unique().tolist()
             cbb['state'] = tk.NORMAL
             cbb.current(0)
         if selected in full_dict['other']:
             cbb = self.__explore_comp['condition1']
             cbb['values'] = ['contains']
+            cbb.current(0)
+            cbb = self.__explore_comp['condition2']
+            cbb['state'] = 'readonly'
             if selected == 'Genres':
-                cbb.current(0)
-                q = Queue()
-
-                def get_genres():
-                    """ Get all unique genres in the dataframe"""
-                    g = self.analysis.get_unique_genres()
-                    q.put(g)
-
-                thread = threading.Thread(target=get_genres)
-                thread.start()
-                progressbar = ttk.Progressbar(self, orient=tk.VERTICAL, mode='indeterminate')
-                progressbar.pack(side=tk.TOP, fill=tk.X, expand=True)
-                progressbar.start()
-
-                def wait():
-                    """ Wait for getting genres"""
-                    if not thread.is_alive():
-                        return
-                    self.update()
-                    self.after(10, wait)
-
-                wait()
-                progressbar.stop()
-                progressbar.pack_forget()
-                thread.join()
-                cbb = self.__explore_comp['condition2']
-                cbb['values'] = q.get()
-                cbb.current(0)
+                cbb['values'] = []
+                cbb.set('')
+
+                def set_genres(genres):
+                    """ Set all unique genres in the dataframe as the condition values"""
+                    cbb['values'] = genres
+                    cbb.current(0)
+
+                self.scheduler.submit('genres', self.analysis.get_unique_genres, set_genres)
             else:
+                cbb['values'] = self.analysis.get_raw()[selected].unique().tolist()
                 cbb.current(0)
-                cbb = self.__explore_comp['condition2']
-                cbb['values'] = self.analysis.get_df()[selected].unique().tolist()
-            if selected != 'Genres' or selected != 'Publisher':
-                cbb['state'] = 'readonly'
-            else:
-                cbb['state'] = tk.NORMAL
-            cbb.current(0)
 
     def __create_detail(self, root: tk.Frame):
         """ Create the frame to display the game details """
@@ -606,7 +608,7 @@ class AnalysisGUI(tk.Tk):
     def __create_table_searchbar(self, root: tk.Frame):
         """ Create the search bar and table component that attach to root frame"""
         scroll = tk.Scrollbar(root, orient='vertical')
-        self.__table = ttk.Treeview(root, yscrollcommand=scroll.set)
+        self.__table = VirtualTreeview(root, yscrollcommand=scroll.set)
         scroll.configure(command=self.__table.yview)
         self.__table.column('#0', width=0, stretch=tk.NO)
         self.__table.heading('#0', text='', anchor=tk.W)
@@ -622,6 +624,7 @@ class AnalysisGUI(tk.Tk):
         # implement search bar
         search_bar = tk.Entry(root, textvariable=self.__query)
         search_bar.bind('<Return>', lambda x: self.handle_search())
+        search_bar.bind('<KeyRelease>', self.handle_search_typing)
         search_button = tk.Button(root, text='Search', font='16', command=self.handle_search)
 
         # Table and Search bar layout management
@@ -632,43 +635,23 @@ class AnalysisGUI(tk.Tk):
 
     def change_image(self, appid: str, label: tk.Label) -> None:
         """ Change the image of the single data(app) """
-        q = Queue()
-
-        try:
-            old_image = label.image  # Save the copy of the image to prevent from python garbage collection
-        except AttributeError:
-            old_image = None
-        label.configure(image=None)
+        label.configure(image='', text='Loading...')
         label.image = None
+        self.__detail_comp['image'] = None
 
-        def load_img():
-            """ Thread worker function """
-            image = self.analysis.get_picture(appid)
-            q.put(image)
+        def show_image(image):
+            """ Show the loaded image """
+            label.configure(text='')
+            self.__detail_comp['image'] = image
+            img = ImageTk.PhotoImage(image)
+            label.configure(image=img)
+            label.image = img  # Save the copy of the image to prevent from python garbage collection
 
-        thread = threading.Thread(target=load_img)
-        thread.start()
+        def show_error(error):
+            """ Show the message when image can not be loaded """
+            label.configure(text='Image not available')
 
-        def wait_process(i):
-            """ Wait for process of loading image to be done"""
-            ls = ['...', '..', '.']
-            if not thread.is_alive():
-                return
-            label.configure(text='Loading' + ls[i])
-            self.update()
-            i += 1
-            if i > 2:
-                i = 0
-            self.after(100, lambda: wait_process(i))
-
-        wait_process(0)
-        label.configure(text='')
-        self.__detail_comp['image'] = q.get()
-        img = ImageTk.PhotoImage(self.__detail_comp['image'])
-        label.configure(image=img)
-        label.image = img
-        if old_image:
-            del old_image
+        self.scheduler.submit('image', lambda: self.analysis.get_picture(appid), show_image, show_error)
 
     def resize_image(self, label: tk.Label, e: tk.Event) -> None:
         """ Resize to image according to width and height of the frame (according to events)"""
@@ -695,13 +678,17 @@ class AnalysisGUI(tk.Tk):
         self.__detail_comp['button']['state'] = tk.NORMAL
         self.__detail_comp['combobox']['state'] = tk.NORMAL
 
-        item_loc = self.__table.focus()
-        item = self.__table.item(item_loc)
-        try:
-            item_id = item['values'][0]
-        except IndexError:
+        item = self.__table.selected_values()
+        if item is None:
+            return
+        item_id = str(item[0])
+        if item_id == self.__detail_comp.get('selected'):
+            # same game is reselected when the table scroll
             return
         self.change_image(item_id, self.__detail_comp['picture'])
+        # the selected image is loaded by change_image, prefetch replaces the prefetch of the older selection
+        nearby = [str(i) for i in self.__table.nearby_values(IMAGE_PREFETCH)[:, 0]]
+        self.analysis.prefetch_pictures([i for i in nearby if i != item_id])
         details = self.analysis.get_specific(item_id)
 
         def get_detail(column: str) -> str:
@@ -719,8 +706,8 @@ class AnalysisGUI(tk.Tk):
         self.__detail_comp['est_owner'].configure(text=get_detail('Estimated owners'))
         self.__detail_comp['steam'].unbind('<Button-1>')
         self.__detail_comp['steamdb'].unbind('<Button-1>')
-        self.__detail_comp['steam'].bind("<Button-1>", lambda x: self.analysis.visit_steam(item['values'][0]))
-        self.__detail_comp['steamdb'].bind("<Button-1>", lambda x: self.analysis.visit_steamdb(item['values'][0]))
+        self.__detail_comp['steam'].bind("<Button-1>", lambda x: self.analysis.visit_steam(item_id))
+        self.__detail_comp['steamdb'].bind("<Button-1>", lambda x: self.analysis.visit_steamdb(item_id))
 
         self.load_dataframe_name(self.__detail_comp['combobox'])
 
@@ -742,88 +729,67 @@ class AnalysisGUI(tk.Tk):
         ls = self.analysis.get_dataframes_name()
         combobox['values'] = ls
 
+    def handle_search_typing(self, *args):
+        """ Handle typing in the search bar, search after user stop typing for SEARCH_DELAY ms"""
+        if self.__search_job is not None:
+            self.after_cancel(self.__search_job)
+        self.__search_job = self.after(SEARCH_DELAY, self.handle_search)
+
     def handle_search(self):
         """ Handle the search functionality"""
+        if self.__search_job is not None:
+            self.after_cancel(self.__search_job)
+            self.__search_job = None
         search_q = self.__query.get()
-        if not search_q.isspace() and search_q != '':
-            q = Queue()
-
-            self.clear_table()
-
-            def search(query: str, queue: Queue):
-                r = self.analysis.search(query)
-                queue.put(r)
-
-            def wait():
-                if not thread.is_alive():
-                    return
-                self.after(10, wait)
-
-            thread = threading.Thread(target=lambda: search(search_q, q))
-            thread.start()
-
-            wait()
-            thread.join()
-            self.load_table(q.get())
+        if search_q.isspace():
+            search_q = ''
+        if search_q == self.__searched:
+            return
+        self.__searched = search_q
+        if search_q != '':
+            self.scheduler.submit('search', lambda: self.analysis.search(search_q), self.show_search_result)
         else:
+            self.scheduler.cancel('search')
             self.load_table(self.analysis.get_raw())
 
+    def show_search_result(self, dataframe):
+        """ Load the search result into the table and prefetch images of the top results"""
+        self.load_table(dataframe)
+        self.analysis.prefetch_pictures(dataframe['AppID'].astype(str).head(IMAGE_PREFETCH).tolist())
+
     def load_table(self, dataframe):
-        """ Insert all the data into the treeview"""
-        q = Queue()
-
-        def data_prep(df, que: Queue):
-            """ Thread worker to prepare data to add into the treeview"""
-            df = df[['AppID', 'Name']]
-            for i, r in df.iterrows():
-                data = (i, list(r))
-                que.put(data)
-
-        thread = threading.Thread(target=data_prep, args=(dataframe, q))
-        thread.start()
-        self.clear_table()
-
-        def update_table():
-            """ Update the treeview according to queue"""
-            if not q.empty():
-                for _ in range(1000):
-                    if q.empty():
-                        break
-                    index, values = q.get()
-                    self.__table.insert("", 0, text=index, values=values)
-                self.update()
-                self.after(1, update_table)
-
-        thread.join()
-        update_table()
+        """ Load the data into the treeview (only visible rows are inserted into the widget)"""
+        self.__table.set_data(dataframe[['AppID', 'Name']].to_numpy())
 
     def clear_table(self):
         """ Clear treeview table"""
-        self.__table.delete(*self.__table.get_children())
+        self.__table.clear()
+
+    def show_statistic(self, statistic: dict) -> None:
+        """ Show the statistic of the plotted columns in the explore page"""
+        lines = [f"{col}: n={stats['count']:,}, Mean: {stats['mean']:.2f}, Median: {stats['median']:.2f}, "
+                 f"SD: {stats['std']:.2f}, Range: {stats['min']:.2f} - {stats['max']:.2f}"
+                 for col, stats in statistic.items()]
+        self.__explore_comp['statistic'].configure(text='\n'.join(lines))
 
-    def get_descriptive_statistic(self, root, col: str) -> tk.LabelFrame:
+    @staticmethod
+    def get_descriptive_statistic(root, stats: dict, col: str) -> tk.LabelFrame:
         """ Create a label frame of the descriptive statistics """
         desc = tk.LabelFrame(root, text=col, font="22")
-        df = self.analysis.get_df()
-        range_l = tk.Label(desc, text=f"Range: {df[col].min():.2f} - {df[col].max():.2f}",
+        range_l = tk.Label(desc, text=f"Range: {stats['min']:.2f} - {stats['max']:.2f}",
                            font='16', anchor='w', justify='left')
-        mean = tk.Label(desc, text=f"Mean: {df[col].mean():.2f}",
+        mean = tk.Label(desc, text=f"Mean: {stats['mean']:.2f}",
                         font='16', anchor='w', justify='left')
-        median = tk.Label(desc, text=f"Median: {df[col].median():.2f}",
+        median = tk.Label(desc, text=f"Median: {stats['median']:.2f}",
                           font='16', anchor='w', justify='left')
-        mode_val = df[col].mode()
-        count_mode_val = df[df[col] == mode_val[0]].count()[col]
-        mode = tk.Label(desc, text=f"Mode: {mode_val[0]}, Count: {count_mode_val}",
+        mode = tk.Label(desc, text=f"Mode: {stats['mode']}, Count: {stats['mode count']}",
                         font='16', anchor='w', justify='left')
-        sd = tk.Label(desc, text=f"SD: {df[col].std():.2f}", font='16',
+        sd = tk.Label(desc, text=f"SD: {stats['std']:.2f}", font='16',
                       anchor='w', justify='left')
-        var = tk.Label(desc, text=f"Variance: {df[col].var():.2f}", font='16', anchor='w', justify='left')
-        q1 = df[col].quantile(0.25)
-        q1_l = tk.Label(desc, text=f"Q1: {q1:.2f}", font='16', anchor='w', justify='left')
-        q3 = df[col].quantile(0.75)
-        q3_l = tk.Label(desc, text=f"Q1: {q3:.2f}", font='16', anchor='w', justify='left')
-        iqr = q3 - q1
-        iqr_l = tk.Label(desc, text=f"IQR: {iqr:.2f}", font='16', anchor='w', justify='left')
+        var = tk.Label(desc, text=f"Variance: {stats['var']:.2f}", font='16', anchor='w', justify='left')
+        q1_l = tk.Label(desc, text=f"Q1: {stats['q1']:.2f}", font='16', anchor='w', justify='left')
+        q3_l = tk.Label(desc, text=f"Q3: {stats['q3']:.2f}", font='16', anchor='w', justify='left')
+        iqr_l = tk.Label(desc, text=f"IQR: {stats['iqr']:.2f}", font='16', anchor='w', justify='left')
 
         extendable = {'expand': True, 'fill': tk.X}
         range_l.pack(side=tk.TOP, **extendable)
@@ -846,5 +812,10 @@ class AnalysisGUI(tk.Tk):
         confirmation = tk.messagebox.askokcancel(title="Exit Application",
                                                  message="Are you sure you want to exit?")
         if confirmation:
+            self.scheduler.shutdown()
             self.analysis.save_all()
+            errors = self.analysis.shutdown()
+            if errors:
+                tk.messagebox.showerror("Save Failed", "Some dataframes could not be saved:\n"
+                                        + "\n".join(str(i) for i in errors))
             self.quit()
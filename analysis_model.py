@@ -2,26 +2,56 @@
 this module handle most of the operation related to the data"""
 
 
-from io import BytesIO
+import time
 import webbrowser
-import requests
 import numpy as np
 import pandas as pd
 from PIL import Image
 from matplotlib.figure import Figure
 from dataframesaver import DataFrameSaver as Ds
-from matplotlib import pyplot as plt
+from dashboard import Dashboard
+from filter_engine import build_mask, normalize_conditions, FilterCache
+from histogram_engine import histogram, HistogramEngine
+from statistics_engine import describe, StatisticsEngine
+from search_index import SearchIndex
+from genre_index import GenreIndex
+from image_service import ImageService, IMAGE_CACHE_SUFFIX
+
+SEARCH_LIMIT = 1000
+# Key of the raw data without filter (same as load_filtered of unsaved dataframe without condition)
+RAW_KEY = ((None, 0), ())
+# Scatter plot with more points than threshold is drawn as density (hexbin) or stratified sample
+SCATTER_THRESHOLD = 20000
+SCATTER_LARGE_MODE = 'hexbin'
+# Pie categories below this share of the total are merged into "Other"
+PIE_OTHER_THRESHOLD = 0.015
+# Predefined derived columns, computed with vectorized column operations
+DERIVED_COLUMNS = {
+    'Rating': lambda df: df['Positive'] / (df['Positive'] + df['Negative']) * 100,
+    'Primary Genres': lambda df: df['Genres'].str.split(',', n=1).str[0],
+}
 
 
 class Analysis:
     """ Analysis model for all operation in GUI application"""
     def __init__(self, csv_name):
         self.df = Ds(csv_name)
+        raw = self.df.get_raw()
+        self.__search_index = SearchIndex(raw['AppID'], raw['Name'])
+        self.__genre_index = GenreIndex(raw['AppID'], raw['Genres'])
+        # genre filter match whole genre with the precomputed index instead of substring
+        self.__column_filters = {('Genres', 'contains'): self.__genre_index.mask}
+        self.__filter_cache = FilterCache(column_filters=self.__column_filters)
+        self.__histograms = HistogramEngine()
+        self.__statistics = StatisticsEngine()
+        self.__images = ImageService(csv_name + IMAGE_CACHE_SUFFIX)
+        self.__dashboard = Dashboard(csv_name, self.df.get_dataset_hash(), self.df.get_mode())
+        # name of the operation -> time of the last run in seconds
+        self.__timings = {}
 
     def to_timeseries_count(self, interval: str) -> pd.DataFrame:
         """ returns dataframe that contains count of given column grouped by release date"""
-        df = self.df.df.copy()
-        df = df.set_index(['Release date'])
+        df = self.df.df.set_index(['Release date'])
         df = df.resample(interval)['Name'].count()
         df = pd.DataFrame(df)
         df.reset_index(inplace=True)
@@ -29,8 +59,7 @@ class Analysis:
 
     def to_timeseries_mean(self, interval: str, column: str) -> pd.DataFrame:
         """ returns dataframe that contains mean of given column grouped by release date"""
-        df = self.df.df.copy()
-        df2 = df.set_index(['Release date'])
+        df2 = self.df.df.set_index(['Release date'])
         df2 = df2.resample(interval)[column].mean()
         df2 = pd.DataFrame(df2)
         df2.reset_index(inplace=True)
@@ -40,121 +69,289 @@ class Analysis:
         """ Apply the given function to the dataframe column"""
         self.df.df[target_column] = self.df.df.apply(function, axis=axis)
 
+    def derive(self, target_column: str, expression=None) -> None:
+        """ Add derived column to the dataframe, computed for the whole column at once
+        :param target_column: name of the derived column
+        :param expression: function that take dataframe and return the column, or expression string
+                           for DataFrame.eval (e.g. "Positive - Negative"), predefined column if None
+        """
+        if expression is None:
+            try:
+                expression = DERIVED_COLUMNS[target_column]
+            except KeyError:
+                raise KeyError(f"{target_column} is not a predefined derived column") from None
+        df = self.df.df
+        if isinstance(expression, str):
+            self.df.df = df.assign(**{target_column: df.eval(expression)})
+        else:
+            self.df.df = df.assign(**{target_column: expression(df)})
+
     def filter(self, column: str, expression: str):
         """ Filter and change dataframe to have only data that satisfied expression"""
-        df = self.df.df
-        df2 = df[eval(f"df['{column}']{expression}")]
-        self.df.df = df2
+        self.filter_all([f"{column} {expression}"])
 
     def filter_str(self, column: str, expression: str):
         """ Filter and change dataframe to have only data that satisfied expression"""
-        self.df.df = self.df.df[self.df.df[column].astype(str).str.contains(expression, case=False)]
+        self.filter_all([(column, 'contains', expression)])
 
-    def search(self, query) -> pd.DataFrame:
-        """ Search dataframe based on given query (AppID and Name column) and return dataframe"""
-        df = self.df.get_raw().copy()
-        result = df[df['AppID'].str.contains(query, case=False) | df['Name'].str.contains(query, case=False)]
-        return result
+    def filter_all(self, conditions: list):
+        """ Filter and change dataframe to have only data that satisfied all conditions (in one mask)"""
+        self.df.df = self.df.df[build_mask(self.df.df, conditions, self.__column_filters)]
 
-    def get_correlation(self, x, y) -> float:
-        """ Calculate the correlation between 2 columns in dataframe"""
+    def load_filtered(self, name: str, conditions: list) -> tuple:
+        """ Load the saved dataframe by name (raw data if not exist) and filter it with all conditions
+        the filter masks are cached, so repeated or extended filter lists only evaluate new conditions
+        :return: key of the filtered dataframe (changes when the saved dataframe changes)
+        """
+        try:
+            self.df.load_df(name)
+            key = (name, self.df.get_version(name))
+        except KeyError:
+            self.df.reset_df()
+            key = (None, 0)
+        self.df.df = self.df.df[self.__filter_cache.get_mask(key, self.df.df, conditions)]
+        return key, normalize_conditions(conditions)
+
+    def search(self, query, limit: int = SEARCH_LIMIT) -> pd.DataFrame:
+        """ Search dataframe based on given query (AppID and Name column) and return ranked dataframe"""
+        rows = self.__search_index.search(query, limit)
+        return self.df.get_raw().iloc[rows]
+
+    def get_correlation(self, x, y, df: pd.DataFrame = None) -> float:
+        """ Calculate the correlation between 2 columns in dataframe (active dataframe if not given)"""
+        if df is None:
+            df = self.df.df
         with np.errstate(invalid='ignore'):
-            return self.df.df[x].corr(self.df.df[y])
+            return df[x].corr(df[y])
 
     def get_image(self, appid: str) -> Image:
         """ Get image from appid (url from dataframe) and return Image object"""
         url = self.get_specific(appid)['Header image'].values[0]
-        response = requests.get(url, timeout=2000)
-        return Image.open(BytesIO(response.content))
+        return self.__images.get(url)
+
+    def prefetch_images(self, appids: list) -> None:
+        """ Load the images of the apps in background, so get_image of these apps is served from cache"""
+        urls = [self.get_specific(appid)['Header image'].values for appid in appids]
+        self.__images.prefetch([url[0] for url in urls if len(url) and isinstance(url[0], str)])
+
+    def shutdown(self) -> list:
+        """ Stop the background image loading and wait for the saved dataframes to be written
+        :return: list of the errors of the saved dataframes that could not be written
+        """
+        self.__images.shutdown()
+        return self.df.shutdown()
 
     def get_specific(self, appid: str) -> pd.DataFrame:
         """ Get specific rows in dataframe based on appid and return the dataframe"""
-        df = self.df.get_raw().copy()
-        df = df.loc[df['AppID'] == str(appid)]
-        return df
+        return self.df.get_by_appid(appid)
+
+    def get_dashboard(self, name: str):
+        """ Get the information page artifact by name (computed from raw data and cached if not exist)"""
+        return self.__dashboard.get(name, lambda: self.__compute_dashboard(name))
+
+    def __compute_dashboard(self, name: str):
+        """ Compute the aggregated data of the information page chart/ statistic from raw data"""
+        raw = self.df.get_raw()
+        match name:
+            case 'price histogram':
+                return self.get_histogram(raw, 'Price', RAW_KEY)
+            case 'price statistic':
+                return self.get_statistics(raw, ['Price'], RAW_KEY)['Price']
+            case 'yearly release':
+                return raw.set_index('Release date').resample('YE')['Name'].count().reset_index()
+            case 'genre pie':
+                return DERIVED_COLUMNS['Primary Genres'](raw).value_counts()
+        # Rating of the games that have both positive and negative reviews
+        rated = raw[build_mask(raw, [('Positive', '!=', 0), ('Negative', '!=', 0)])]
+        rating = DERIVED_COLUMNS['Rating'](rated).rename('Rating')
+        match name:
+            case 'price rating scatter':
+                return pd.concat([rated['Price'], rating], axis=1)
+            case 'rating histogram':
+                return self.histogram_counts(rating)
+            case 'rating statistic':
+                return self.descriptive_statistic(rating)
+        raise KeyError(f"{name} is not an information page item")
 
     @staticmethod
-    def plot_histogram(df, x_column: str, x_label: str, y_label: str,
-                       title: str = 'Histogram', bins: int = None) -> Figure:
-        """ Plot histogram according to input """
-        fig, ax = plt.subplots(figsize=(10, 6))
+    def descriptive_statistic(data: pd.Series) -> dict:
+        """ Calculate the descriptive statistic of the data (in one pass, see statistics_engine.describe)"""
+        return describe(data.to_frame('data'), ['data'])['data']
+
+    def get_statistics(self, df: pd.DataFrame, columns: list, key=None) -> dict:
+        """ Calculate the descriptive statistics of the dataframe columns together
+        :param key: key of the dataframe (from load_filtered), the statistics are cached by key and column
+        :return: dictionary of column -> dictionary of the statistics
+        """
+        return self.__statistics.describe(df, columns, key)
+
+    @staticmethod
+    def histogram_counts(data: pd.Series, bins: int = None) -> dict:
+        """ Calculate the histogram counts and bin edges (outliers outside 1.5 IQR are removed,
+        number of bins is bounded Freedman-Diaconis if not given)"""
+        return histogram(data, bins=bins)
+
+    def get_histogram(self, df: pd.DataFrame, column: str, key=None, bins: int = None) -> dict:
+        """ Calculate the histogram counts and bin edges of the dataframe column
+        :param key: key of the dataframe (from load_filtered), the quantile summary is cached by key and column
+        """
+        return self.__histograms.histogram(df[column], key, bins)
+
+    @staticmethod
+    def get_axes(fig: Figure = None):
+        """ Get the figure and a clean axes to draw on, the given figure is cleared and reused
+        figures are created without pyplot (no global state), so plots can be drawn in any thread"""
+        if fig is None:
+            fig = Figure(figsize=(10, 6))
+        else:
+            fig.clear()
+        return fig, fig.add_subplot()
+
+    @staticmethod
+    def plot_histogram_counts(counts: np.ndarray, edges: np.ndarray, x_label: str, y_label: str,
+                              title: str = 'Histogram', fig: Figure = None) -> Figure:
+        """ Plot histogram from precomputed counts and bin edges """
+        fig, ax = Analysis.get_axes(fig)
         ax.set_title(title)
         ax.set_xlabel(x_label)
         ax.set_ylabel(y_label)
-        # Remove using SD
-        data = df[x_column]
-        q1 = data.quantile(0.25)
-        q3 = data.quantile(0.75)
-        iqr = q3 - q1
-        upper_bound = q3 + 1.5 * iqr
-        if data.max() < upper_bound:
-            upper_bound = data.max()
-        lower_bound = q1 - 1.5 * iqr
-        if data.min() > lower_bound:
-            lower_bound = data.min()
-        # plot a graph
-        if not bins:
-            bins = (upper_bound - lower_bound) / 2
-        if bins >= 1:
-            plt.hist(df[x_column], bins=bins.__ceil__(), range=(lower_bound, upper_bound))
-        else:
-            plt.hist(df[x_column], range=(lower_bound, upper_bound))
+        ax.stairs(counts, edges, fill=True)
         return fig
 
+    @staticmethod
+    def plot_histogram(df, x_column: str, x_label: str, y_label: str,
+                       title: str = 'Histogram', bins: int = None, fig: Figure = None) -> Figure:
+        """ Plot histogram according to input (outliers outside 1.5 IQR are removed) """
+        data = histogram(df[x_column], bins=bins)
+        return Analysis.plot_histogram_counts(data['counts'], data['edges'], x_label, y_label, title, fig)
+
     def plot_scatter(self, df, x_column: str, y_column: str, x_label: str, y_label: str,
-                     title: str = 'Scatter Plot') -> Figure:
-        """ Plot the scatter plot of the data """
-        fig, ax = plt.subplots(figsize=(10, 6))
-        plt.scatter(df[x_column], df[y_column])
-        corr = self.get_correlation(x_column, y_column)
+                     title: str = 'Scatter Plot', threshold: int = SCATTER_THRESHOLD,
+                     large_mode: str = SCATTER_LARGE_MODE, fig: Figure = None) -> Figure:
+        """ Plot the scatter plot of the data
+        when the number of points is above threshold, plot hexbin density ('hexbin')
+        or stratified sample with outliers kept ('sample'), correlation is always from all points"""
+        fig, ax = Analysis.get_axes(fig)
+        data = df[[x_column, y_column]].dropna()
+        if len(data) <= threshold:
+            ax.scatter(data[x_column], data[y_column])
+        elif large_mode == 'hexbin':
+            ax.hexbin(data[x_column], data[y_column], gridsize=60, bins='log', mincnt=1)
+            title += f" (density of {len(data):,} points)"
+        elif large_mode == 'sample':
+            sample = self.sample_scatter(data, x_column, y_column, threshold)
+            ax.scatter(sample[x_column], sample[y_column])
+            title += f" (sample of {len(sample):,}/{len(data):,} points, outliers kept)"
+        else:
+            raise ValueError(f"Unknown scatter mode: {large_mode}")
+        corr = self.get_correlation(x_column, y_column, df)
         ax.set_title(title + f"\n Correlation: {corr:.5f}")
         ax.set_xlabel(x_label)
         ax.set_ylabel(y_label)
 
         return fig
 
+    @staticmethod
+    def sample_scatter(df: pd.DataFrame, x_column: str, y_column: str, size: int, grid: int = 20) -> pd.DataFrame:
+        """ Sample at most size points, keep the outliers (outside 1.5 IQR of either column)
+        and sample the other points proportionally from each cell of grid x grid over the two columns"""
+        if len(df) <= size:
+            return df
+        outlier = np.zeros(len(df), dtype=bool)
+        cells = np.zeros(len(df), dtype=np.int64)
+        for column in (x_column, y_column):
+            data = df[column]
+            q1 = data.quantile(0.25)
+            q3 = data.quantile(0.75)
+            iqr = q3 - q1
+            outlier |= ((data < q1 - 1.5 * iqr) | (data > q3 + 1.5 * iqr)).to_numpy()
+            edges = np.linspace(data.min(), data.max(), grid + 1)[1:-1]
+            cells = cells * grid + np.searchsorted(edges, data.to_numpy(), side='right')
+        outliers = df[outlier]
+        if len(outliers) >= size:
+            return outliers.sample(n=size, random_state=0)
+        inliers = df[~outlier]
+        frac = (size - len(outliers)) / len(inliers)
+        sample = inliers.groupby(cells[~outlier]).sample(frac=frac, random_state=0)
+        # each cell rounds its share, the extra points of the rounding are removed at random
+        if len(sample) > size - len(outliers):
+            sample = sample.sample(n=size - len(outliers), random_state=0)
+        return pd.concat([sample, outliers])
+
     @staticmethod
     def plot_line(df, x_column: str, y_column: str, x_label: str, y_label: str,
-                  title: str = 'Line Plot') -> Figure:
+                  title: str = 'Line Plot', fig: Figure = None) -> Figure:
         """ Plot the line plot of the data """
-        fig, ax = plt.subplots(figsize=(10, 6))
-        plt.plot(df[x_column], df[y_column])
+        fig, ax = Analysis.get_axes(fig)
+        ax.plot(df[x_column], df[y_column])
         ax.set_title(title)
         ax.set_xlabel(x_label)
         ax.set_ylabel(y_label)
         return fig
 
+    def plot_pie(self, df, x_column: str, title: str = 'Pie Plot', fig: Figure = None,
+                 threshold: float = PIE_OTHER_THRESHOLD, top: int = None) -> Figure:
+        """ Plot the pie plot of the data (count of each value of the column)
+        :param threshold: values below this share of the total are combined to "Other"
+        :param top: keep only the top most frequent values and combine the rest to "Other" (instead of threshold)
+        """
+        start = time.perf_counter()
+        counts = self.category_counts(df[x_column], threshold, top)
+        self.__timings['pie aggregation'] = time.perf_counter() - start
+        return self.plot_pie_counts(counts, title, fig, threshold=0)
+
     @staticmethod
-    def plot_pie(df, x_column: str,
-                 title: str = 'Pie Plot') -> Figure:
-        """ Plot the pie plot of the data """
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-        n_df = df.groupby(df[x_column]).count().reset_index()
-
-        def assign_others(x):
-            """ Combine the values that below 5% of total to "Others"""
-            if x['Name'] < 0.015 * n_df['Name'].sum():
-                return 'Other'
-            return str(x[x_column])
-
-        n_df[x_column] = n_df.apply(assign_others, axis=1)
-        n_df = n_df.groupby(n_df[x_column]).sum()
-        data = n_df['Name'].to_numpy()
-        plt.pie(data, labels=n_df.index, autopct='%1.1f%%')
+    def plot_pie_counts(counts: pd.Series, title: str = 'Pie Plot', fig: Figure = None,
+                        threshold: float = PIE_OTHER_THRESHOLD, top: int = None) -> Figure:
+        """ Plot the pie plot of precomputed counts (index is the label), see merge_other for threshold and top"""
+        fig, ax = Analysis.get_axes(fig)
+        data = Analysis.merge_other(counts, threshold, top)
+        ax.pie(data.to_numpy(), labels=data.index, autopct='%1.1f%%')
         ax.set_title(title)
         return fig
 
+    @staticmethod
+    def category_counts(data: pd.Series, threshold: float = PIE_OTHER_THRESHOLD, top: int = None) -> pd.Series:
+        """ Count each value of the categorical data, small categories are combined to "Other"
+        (see merge_other for threshold and top)"""
+        counts = data.value_counts()
+        # categorical data also counts the categories that are not in the data
+        return Analysis.merge_other(counts[counts > 0], threshold, top)
+
+    @staticmethod
+    def merge_other(counts: pd.Series, threshold: float = PIE_OTHER_THRESHOLD, top: int = None) -> pd.Series:
+        """ Combine the small categories of the counts to "Other" (sorted from the most frequent)
+        :param threshold: categories below this share of the total are combined
+        :param top: keep only the top most frequent categories and combine the rest (instead of threshold)
+        """
+        counts = counts.sort_values(ascending=False)
+        if top is not None:
+            other = np.arange(len(counts)) >= top
+        else:
+            other = (counts < threshold * counts.sum()).to_numpy()
+        if not other.any():
+            return counts
+        data = counts[~other]
+        data.index = data.index.astype(str)
+        data = pd.concat([data, pd.Series([counts[other].sum()], index=['Other'])])
+        # a category that is already named "Other" is combined as well
+        return data.groupby(level=0, sort=False).sum()
+
+    def get_timings(self) -> dict:
+        """ Get the time of the last run of the timed operations in seconds (e.g. 'pie aggregation')"""
+        return dict(self.__timings)
+
     def get_saved_name(self) -> list:
         """ Get all of saved dataframe name"""
         return self.df.get_all_name()
 
     def get_all_genres(self) -> list:
         """ Get all unique genres of app in the dataframe"""
-        df = self.df.get_raw()
-        unique = [genre for row in df['Genres'].tolist() for genre in row.split(",")]
-        unique = set(unique)
-        return list(unique)
+        return self.__genre_index.get_genres()
+
+    def get_genre_counts(self, df: pd.DataFrame = None) -> pd.Series:
+        """ Get number of games in each genre of the dataframe (raw data if None)"""
+        return self.__genre_index.counts(df)
 
     def add_to_dataframe(self, content: (pd.Series, pd.DataFrame), name: str) -> None:
         """ Add specified content to named dataframe """
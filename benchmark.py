@@ -0,0 +1,130 @@
+""" Benchmark module for analysis application
+measure the dataset operations with the old and the current implementation on a dataset csv
+(run: python benchmark.py [csv] [benchmark ...])"""
+
+import sys
+import time
+import multiprocessing
+import numpy as np
+from dataframesaver import DataFrameSaver as Ds
+from filter_engine import FilterCache, build_mask, condition_mask
+from ingestion import INGEST_MODE, read_dataset
+
+try:
+    # peak RSS is read with getrusage, which is Unix only
+    import resource
+except ImportError:
+    resource = None
+
+# number of dataframes the application holds at once (raw, active, saved and the views of the pages)
+COPY_COUNT = 6
+LOOKUP_COUNT = 10000
+# the scan takes milliseconds per lookup, it is timed on the first lookups only
+SCAN_COUNT = 1000
+# filter stacks of the benchmark are the first 5 to 10 conditions
+FILTER_CONDITIONS = [('Price', '>=', '0.99'), ('Windows', '==', 'True'), ('Positive', '>', '10'),
+                     ('Negative', '<', '1000'), ('Name', 'contains', 'a'), ('Required age', '<=', '17'),
+                     ('Peak CCU', '>=', '1'), ('Average playtime forever', '>', '0'),
+                     ('Release date', '>=', '2010-01-01'), ('DLC count', '<', '5')]
+FILTER_REPEAT = 20
+
+
+def peak_rss() -> int:
+    """ Peak resident set size of this process in bytes (ru_maxrss is in KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def isolated(function, *args):
+    """ Run the function in a new process, so the peak RSS of each measurement starts from an empty process"""
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(function, args)
+
+
+def copy_workload(filename: str, deep: bool) -> tuple:
+    """ Hold COPY_COUNT copies of the dataset like the pages do, read every column of each copy
+    and modify one column of the last copy
+    :param deep: deep copies (before copy-on-write) or shallow copy-on-write views
+    :return: tuple of (peak RSS after reading the dataset, peak RSS after the copies) in bytes
+    """
+    raw = read_dataset(filename, INGEST_MODE)
+    loaded = peak_rss()
+    copies = [raw.copy(deep=deep) for _ in range(COPY_COUNT)]
+    for df in copies:
+        for column in df.columns:
+            df[column].iloc[:1].to_numpy()
+    copies[-1]['Price'] = copies[-1]['Price'] * 2
+    return loaded, peak_rss()
+
+
+def report_copies(filename: str) -> None:
+    """ Print the peak RSS of holding the copies of the dataset with deep copies and copy-on-write views"""
+    if resource is None:
+        print(f"skipped: peak RSS is not available on {sys.platform}")
+        return
+    for name, deep in (('deep', True), ('cow', False)):
+        loaded, peak = isolated(copy_workload, filename, deep)
+        print(f"{name:>8}: peak RSS {loaded / 2 ** 20:,.1f} MiB after read, {peak / 2 ** 20:,.1f} MiB "
+              f"with {COPY_COUNT} copies (+{(peak - loaded) / 2 ** 20:,.1f} MiB)")
+
+
+def report_lookups(filename: str, count: int = LOOKUP_COUNT) -> None:
+    """ Print the time of looking up games by AppID with a scan of the AppID column (first SCAN_COUNT lookups)
+    and with the AppID index (one in ten AppID does not exist)"""
+    start = time.perf_counter()
+    saver = Ds(filename)
+    print(f"{'load':>8}: {time.perf_counter() - start:.2f} s (read dataset and build AppID index)")
+    raw = saver.get_raw()
+    appids = np.random.default_rng(0).choice(raw['AppID'].to_numpy(), count).astype(str)
+    appids[::10] = '-1'
+    for name, lookup, ids in (('scan', lambda appid: raw.loc[raw['AppID'] == appid], appids[:SCAN_COUNT]),
+                              ('index', saver.get_by_appid, appids)):
+        start = time.perf_counter()
+        found = sum(len(lookup(appid)) for appid in ids)
+        seconds = time.perf_counter() - start
+        print(f"{name:>8}: {len(ids):,} lookups in {seconds:.3f} s ({seconds / len(ids) * 1e6:,.1f} us each, "
+              f"{seconds / len(ids) * count:.2f} s per {count:,}), {found:,} found")
+    saver.shutdown()
+
+
+def filter_each(df, conditions: list):
+    """ Filter the dataframe one condition at a time (a new frame for each condition, as before build_mask)"""
+    for condition in conditions:
+        df = df[condition_mask(df, *condition)]
+    return df
+
+
+def report_filters(filename: str, repeat: int = FILTER_REPEAT) -> None:
+    """ Print the average time of applying stacks of 5 to 10 filters one by one, with one combined mask
+    and with the filter cache (whole stack cached, and stack that adds one filter to a cached stack)"""
+    df = read_dataset(filename, INGEST_MODE)
+    cache = FilterCache()
+    # name -> (filter function, conditions cached before the run or None)
+    variants = {'each': (lambda conditions: filter_each(df, conditions), None),
+                'mask': (lambda conditions: df[build_mask(df, conditions)], None),
+                'cached': (lambda conditions: df[cache.get_mask('raw', df, conditions)], 0),
+                'extend': (lambda conditions: df[cache.get_mask('raw', df, conditions)], -1)}
+    for size in range(5, len(FILTER_CONDITIONS) + 1):
+        conditions = FILTER_CONDITIONS[:size]
+        times = []
+        for name, (function, cached) in variants.items():
+            seconds = 0
+            for _ in range(repeat):
+                cache.clear()
+                if cached is not None:
+                    cache.get_mask('raw', df, conditions[:len(conditions) + cached])
+                start = time.perf_counter()
+                rows = len(function(conditions))
+                seconds += time.perf_counter() - start
+            times.append(f"{name} {seconds / repeat * 1000:,.2f} ms")
+        print(f"{size:>3} filters: {', '.join(times)} ({rows:,} rows)")
+
+
+BENCHMARKS = {'copies': report_copies, 'lookups': report_lookups, 'filters': report_filters}
+
+
+if __name__ == '__main__':
+    csv = sys.argv[1] if len(sys.argv) > 1 else 'game_market_data.csv'
+    for benchmark in sys.argv[2:] or BENCHMARKS:
+        print(f"[{benchmark}]")
+        BENCHMARKS[benchmark](csv)
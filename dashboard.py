@@ -0,0 +1,60 @@
+""" Dashboard module for the information page
+cache the aggregated data of the information page charts on disk, keyed by the dataset hash and ingestion mode"""
+
+import os
+import pickle
+import threading
+import pandas as pd
+
+DASHBOARD_SUFFIX = '.dashboard.pkl'
+DASHBOARD_VERSION = 3
+
+
+class Dashboard:
+    """ On-disk cache of the information page artifacts (aggregated data of each chart)
+    artifacts are computed once per dataset and loaded on the later start"""
+
+    def __init__(self, filename: str, dataset_hash: str, mode: str):
+        self.__filename = filename + DASHBOARD_SUFFIX
+        self.__hash = dataset_hash
+        # artifacts depend on the columns and dtypes read in the ingestion mode
+        self.__mode = mode
+        self.__lock = threading.Lock()
+        self.__artifacts = self.__read()
+
+    def get(self, name: str, compute):
+        """ Return the artifact by name, compute it with compute() and save to disk if it is not cached"""
+        with self.__lock:
+            if name in self.__artifacts:
+                return self.__artifacts[name]
+        artifact = compute()
+        with self.__lock:
+            self.__artifacts[name] = artifact
+            self.__write()
+        return artifact
+
+    def __read(self) -> dict:
+        """ Read the artifacts from disk, return empty dictionary if file is missing, corrupted or for other
+        dataset/ mode/ pandas version (artifacts are pickled pandas objects)"""
+        try:
+            with open(self.__filename, 'rb') as f:
+                data = pickle.load(f)
+            if not isinstance(data, dict) or data['version'] != DASHBOARD_VERSION or data['hash'] != self.__hash \
+                    or data['mode'] != self.__mode or data['pandas'] != pd.__version__:
+                return {}
+            return dict(data['artifacts'])
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError, ImportError, TypeError,
+                ValueError):
+            return {}
+
+    def __write(self) -> None:
+        """ Write all artifacts to disk (atomic replace)"""
+        data = {'version': DASHBOARD_VERSION, 'hash': self.__hash, 'mode': self.__mode, 'pandas': pd.__version__,
+                'artifacts': self.__artifacts}
+        try:
+            with open(self.__filename + '.tmp', 'wb') as f:
+                pickle.dump(data, f)
+            os.replace(self.__filename + '.tmp', self.__filename)
+        except OSError:
+            # cache is optional, artifacts will be computed again on the next start
+            pass
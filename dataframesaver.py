@@ -1,86 +1,345 @@
 """ Module for save, load and process dataframes (only small/ essential operation)"""
 
 import glob
+import hashlib
+import json
+import numpy as np
 import pandas as pd
 import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from ingestion import INGEST_MODE, read_dataset, read_header, to_datetime_column
+
+CACHE_SUFFIX = '.cache.pkl'
+CACHE_META_SUFFIX = '.cache.json'
+# changed when the parsed dataframe changes (e.g. dtypes of ingestion), older caches are parsed again
+CACHE_VERSION = 2
+SAVED_DIR = 'saved'
+SAVED_SUFFIX = '.pkl'
+# AppID added to saved dataframe after its file is written (one per line)
+JOURNAL_SUFFIX = '.journal'
+# saved dataframe is rewritten (and its journal removed) on the next save when the journal is longer
+JOURNAL_COMPACT = 1000
+# number of saved dataframes read from disk that are kept in memory
+SAVED_CACHE_SIZE = 8
+
+if int(pd.__version__.split('.')[0]) < 3:
+    # Copy-on-write let shallow copies share memory until one of them is modified
+    # (always enabled from pandas 3.0)
+    pd.set_option('mode.copy_on_write', True)
 
 
 class DataFrameSaver:
     """ Class to save, load, and process the dataframes"""
-    def __init__(self, filename: str):
-        self.__raw_df = pd.read_csv(filename)
-        self.__raw_df['AppID'] = self.__raw_df['AppID'].astype(str)
-        self.df = self.__raw_df.copy(deep=True)
-        self.to_datetime()
-        self.__raw_df['Release date'] = self.df['Release date']
-        self.df = self.__raw_df.copy(deep=True)
-        self.__saved_df = {}
+    def __init__(self, filename: str, mode: str = INGEST_MODE):
+        self.__filename = filename
+        self.__mode = mode
+        self.__hash = None
+        self.__raw_df = self.read_dataset(filename, mode)
+        # columns of the dataset csv, including the ones not read in reduced mode (not derived columns)
+        self.__dataset_columns = self.__raw_df.columns.union(read_header(filename), sort=False)
+        # AppID -> row position in raw data, for constant time lookup of single game
+        self.__appid_index = dict(zip(self.__raw_df['AppID'], range(len(self.__raw_df))))
+        self.df = self.__raw_df.copy(deep=False)
+        # name -> file of the saved dataframe on disk (read on the first use)
+        self.__saved_files = {}
+        # name -> SavedRows in memory (least recently used first), dirty ones are kept until saved
+        self.__saved_df = OrderedDict()
+        # name -> AppID added since the file is written (appended to journal), None if file must be rewritten
+        self.__dirty = {}
+        self.__saved_lock = threading.RLock()
+        # saved files are written one by one in background, in the order of save_all_df
+        self.__writer = ThreadPoolExecutor(max_workers=1)
+        self.__writes = []
+        # name -> future of the last write of the saved dataframe that is not finished (not evicted until then)
+        self.__writing = {}
+        # number of times each saved dataframe changed, used for invalidating cached results
+        self.__versions = {}
         self.read_saved_df()
 
+    def read_dataset(self, filename: str, mode: str = INGEST_MODE) -> pd.DataFrame:
+        """ Read the parsed dataset from the binary cache next to the csv if it is still valid,
+        otherwise parse the csv (see ingestion.read_dataset for mode) and rebuild the cache"""
+        df = read_cache(filename, mode)
+        if df is not None:
+            return df
+        df = read_dataset(filename, mode)
+        write_cache(filename, df, mode)
+        return df
+
+    def get_dataset_hash(self) -> str:
+        """ Get sha256 hash of the dataset csv (from the cache metadata when it is up-to-date)"""
+        if self.__hash is None:
+            self.__hash = read_cache_hash(self.__filename) or file_hash(self.__filename)
+        return self.__hash
+
+    def get_mode(self) -> str:
+        """ Get the ingestion mode of the raw data (see ingestion.read_dataset)"""
+        return self.__mode
+
     def to_datetime(self):
         """ Convert release data attribute to datetime object"""
-        self.df['Release date'] = self.df['Release date'].apply(lambda x: to_datetime(x))
+        if not pd.api.types.is_datetime64_any_dtype(self.df['Release date']):
+            self.df['Release date'] = to_datetime_column(self.df['Release date'])
 
     def to_list(self, col: str):
         """ convert specified column to list"""
         self.df[col] = self.df.apply(lambda x: x[col].split(','), axis=1)
 
     def save_df(self, name: str):
-        """ Saves actives dataframe into a dict"""
-        self.__saved_df[name] = self.df.copy()
+        """ Saves actives dataframe into a dict (as row positions of the raw data and its derived columns)"""
+        with self.__saved_lock:
+            self.__put_saved(name, SavedRows(*self.__split(self.df)), None)
 
     def load_df(self, name: str):
         """ Loads dataframe from saved dict by name"""
-        if name in self.__saved_df:
-            self.df = self.__saved_df[name].copy()
-        else:
-            raise KeyError(f"{name} does not exist in saved dataframes")
+        with self.__saved_lock:
+            saved = self.__get_saved(name)
+        self.df = saved.to_frame(self.__raw_df).copy(deep=False)
 
     def reset_df(self):
         """ Resets active dataframe to raw data"""
-        self.df = self.__raw_df.copy(deep=True)
+        self.df = self.__raw_df.copy(deep=False)
 
     def get_raw(self) -> pd.DataFrame:
-        """ Get raw data of the dataset"""
-        return self.__raw_df.copy(deep=True)
+        """ Get raw data of the dataset (copy-on-write view, share memory with the raw data)"""
+        return self.__raw_df.copy(deep=False)
+
+    def get_by_appid(self, appid: str) -> pd.DataFrame:
+        """ Get the row of raw data with given appid (empty dataframe if not found)"""
+        try:
+            return self.__raw_df.iloc[[self.__appid_index[str(appid)]]]
+        except KeyError:
+            return self.__raw_df.iloc[[]]
 
     def get_all_name(self) -> list:
         """ Get all names of the dataset"""
-        return list(self.__saved_df.keys())
+        with self.__saved_lock:
+            return list(dict.fromkeys([*self.__saved_files, *self.__saved_df]))
+
+    def get_version(self, name: str) -> int:
+        """ Get the number of times the saved dataframe changed"""
+        return self.__versions.get(name, 0)
 
     def add_to_saved_df(self, content: (pd.DataFrame, pd.Series), name: str):
-        """ Saves dataframe to saved"""
-        try:
-            df = self.__saved_df[name]
-            self.__saved_df[name] = pd.concat([df, content])
-            self.__saved_df[name].drop_duplicates(keep='first', inplace=True)
-        except KeyError:
-            self.__saved_df[name] = pd.DataFrame(content)
+        """ Saves dataframe to saved (rows already in the saved dataframe are skipped)
+        added AppID are appended to the journal of the saved file instead of rewriting it"""
+        if isinstance(content, pd.Series):
+            content = content.to_frame().T
+        positions, derived = self.__split(content)
+        with self.__saved_lock:
+            try:
+                saved = self.__get_saved(name)
+            except KeyError:
+                self.__put_saved(name, SavedRows(positions, derived), None)
+                return
+            new = saved.add(positions, derived)
+            appended = self.__dirty.get(name, [])
+            if appended is None or derived is not None or not self.__saved_files.get(name, '').endswith(SAVED_SUFFIX):
+                appended = None
+            else:
+                appended = appended + self.__raw_df['AppID'].to_numpy()[new].tolist()
+            self.__put_saved(name, saved, appended)
 
     def read_saved_df(self) -> None:
-        """ Read saved dataframe from saved file"""
-        try:
-            os.chdir('saved')
-        except FileNotFoundError:
-            os.mkdir('saved')
-            os.chdir('saved')
-        all_csv = glob.glob('*.csv')
-        for i in all_csv:
-            df = pd.read_csv(i)
-            name = str(i).removesuffix('.csv')
-            self.__saved_df[name] = df
-        os.chdir('../')
+        """ Index the saved dataframes in saved directory by name, each one is read on the first use
+        (dataframes saved as csv by older version are used when there is no newer file)"""
+        os.makedirs(SAVED_DIR, exist_ok=True)
+        with self.__saved_lock:
+            for i in sorted(glob.glob(os.path.join(SAVED_DIR, '*.csv'))):
+                self.__saved_files[os.path.basename(i).removesuffix('.csv')] = i
+            for i in sorted(glob.glob(os.path.join(SAVED_DIR, '*' + SAVED_SUFFIX))):
+                self.__saved_files[os.path.basename(i).removesuffix(SAVED_SUFFIX)] = i
 
     def save_all_df(self):
-        """ Saves dataframe to saved file"""
+        """ Saves the dirty dataframes to saved file in background (see flush), a dataframe that only has
+        added rows is appended to its journal, the others are rewritten (AppID of the rows and derived columns)
+        the saved file of a dataframe is used only after its write finished, a failed write marks it dirty again"""
+        os.makedirs(SAVED_DIR, exist_ok=True)
+        with self.__saved_lock:
+            # keep the writes that are not finished or failed (for flush)
+            self.__writes = [i for i in self.__writes if not i.done() or i.exception() is not None]
+            dirty, self.__dirty = self.__dirty, {}
+            for name, appended in dirty.items():
+                path = os.path.join(SAVED_DIR, name + SAVED_SUFFIX)
+                if appended is None:
+                    future = self.__writer.submit(write_saved, path, self.__saved_df[name].to_compact(self.__raw_df))
+                elif appended:
+                    future = self.__writer.submit(append_journal, path, appended)
+                else:
+                    continue
+                self.__writes.append(future)
+                self.__writing[name] = future
+                future.add_done_callback(lambda f, n=name, p=path, a=appended: self.__written(n, p, a, f))
+            self.__evict_saved()
+
+    def flush(self) -> list:
+        """ Wait until all saved files are written
+        :return: list of the errors of the failed writes (their dataframes are dirty again)
+        """
+        writes, self.__writes = self.__writes, []
+        wait(writes)
+        return [i.exception() for i in writes if i.exception() is not None]
+
+    def shutdown(self) -> list:
+        """ Wait for the saved files to be written and stop the writer thread
+        :return: list of the errors of the failed writes, see flush
+        """
+        self.__writer.shutdown(wait=True)
+        return self.flush()
+
+    def __get_saved(self, name: str) -> 'SavedRows':
+        """ Get the saved dataframe by name, read it from disk if it is not in memory (call with lock)"""
+        if name in self.__saved_df:
+            self.__saved_df.move_to_end(name)
+            return self.__saved_df[name]
+        if name not in self.__saved_files:
+            raise KeyError(f"{name} does not exist in saved dataframes")
+        # dataframe that is being written is not evicted, so its file is complete here
+        path = self.__saved_files[name]
         try:
-            os.chdir('saved')
-        except FileNotFoundError:
-            os.mkdir('saved')
-            os.chdir('saved')
-        for i in self.__saved_df:
-            self.__saved_df[i].to_csv(i + '.csv')
-        os.chdir('../')
+            if path.endswith('.csv'):
+                df = pd.read_csv(path, dtype={'AppID': str}).drop(columns='Unnamed: 0', errors='ignore')
+            else:
+                df = pd.read_pickle(path)
+            journal = read_journal(path)
+        except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError, AttributeError, ImportError,
+                TypeError) as e:
+            raise KeyError(f"{name} can not be read from {path}: {e}") from None
+        saved = SavedRows(*self.__split(df))
+        if journal:
+            saved.add(*self.__split(pd.DataFrame({'AppID': journal})))
+        self.__saved_df[name] = saved
+        if len(journal) > JOURNAL_COMPACT:
+            self.__dirty[name] = None
+        self.__evict_saved()
+        return saved
+
+    def __put_saved(self, name: str, saved: 'SavedRows', appended: (list, None)) -> None:
+        """ Store the changed saved dataframe in memory until it is saved (call with lock)
+        :param appended: AppID added since the file is written, None if the file must be rewritten
+        """
+        self.__saved_df[name] = saved
+        self.__saved_df.move_to_end(name)
+        self.__dirty[name] = appended
+        self.__versions[name] = self.__versions.get(name, 0) + 1
+
+    def __written(self, name: str, path: str, appended: (list, None), future) -> None:
+        """ Update the saved file and dirty state of the dataframe when its write finished (writer thread)
+        :param appended: AppID appended to the journal by the write, None if the file is rewritten
+        """
+        with self.__saved_lock:
+            if self.__writing.get(name) is future:
+                del self.__writing[name]
+            if future.exception() is None:
+                if appended is None:
+                    self.__saved_files[name] = path
+                return
+            # written again on the next save, AppID added after the failed write are kept
+            dirty = self.__dirty.get(name, [])
+            self.__dirty[name] = None if appended is None or dirty is None else appended + dirty
+
+    def __evict_saved(self) -> None:
+        """ Remove the least recently used saved dataframes that are not dirty or being written over the cache size"""
+        clean = [i for i in self.__saved_df if i not in self.__dirty and i not in self.__writing]
+        for name in clean[:max(0, len(clean) - SAVED_CACHE_SIZE)]:
+            del self.__saved_df[name]
+
+    def __split(self, df: pd.DataFrame) -> tuple:
+        """ Split the dataframe into raw data row positions (matched by AppID, unknown AppID are removed)
+        and the derived columns indexed by row position (None if no such column), columns of the dataset csv
+        that are not in the raw data (not read in reduced mode) are dropped instead of kept as derived"""
+        positions = np.fromiter((self.__appid_index.get(str(i), -1) for i in df['AppID']),
+                                dtype=np.int64, count=len(df))
+        known = positions >= 0
+        columns = df.columns.difference(self.__dataset_columns, sort=False)
+        derived = None
+        if not columns.empty:
+            derived = df.loc[known, columns]
+            derived.index = positions[known]
+            derived = derived[~derived.index.duplicated()]
+        return positions[known], derived
+
+
+class SavedRows:
+    """ Saved dataframe as an insertion ordered set of raw data row positions (dict keys)
+    and the derived columns (not in the dataset) indexed by row position"""
+
+    def __init__(self, positions: np.ndarray, columns: pd.DataFrame = None):
+        self.__rows = dict.fromkeys(positions.tolist())
+        self.__columns = columns
+        self.__frame = None
+
+    def add(self, positions: np.ndarray, columns: pd.DataFrame = None) -> list:
+        """ Add the rows (constant time per row), rows that already exist are skipped
+        :return: list of the positions that are added
+        """
+        new = list(dict.fromkeys(i for i in positions.tolist() if i not in self.__rows))
+        if not new:
+            return new
+        self.__rows.update(dict.fromkeys(new))
+        if columns is not None:
+            columns = columns[columns.index.isin(new)]
+            self.__columns = columns if self.__columns is None else pd.concat([self.__columns, columns])
+        self.__frame = None
+        return new
+
+    def get_positions(self) -> np.ndarray:
+        """ Get the row positions in insertion order"""
+        return np.fromiter(self.__rows, dtype=np.int64, count=len(self.__rows))
+
+    def get_columns(self) -> (pd.DataFrame, None):
+        """ Get the derived columns in the order of the rows (None if no derived column)"""
+        if self.__columns is None:
+            return None
+        return self.__columns.reindex(self.get_positions())
+
+    def to_frame(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """ Build the dataframe from the raw data (cached until the rows change)"""
+        if self.__frame is None:
+            frame = raw.iloc[self.get_positions()]
+            columns = self.get_columns()
+            if columns is not None:
+                frame = frame.assign(**{i: columns[i].to_numpy() for i in columns.columns})
+            self.__frame = frame
+        return self.__frame
+
+    def to_compact(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """ Build the compact form for saving, AppID of the rows and the derived columns"""
+        compact = pd.DataFrame({'AppID': raw['AppID'].to_numpy()[self.get_positions()]})
+        columns = self.get_columns()
+        if columns is not None:
+            compact = pd.concat([compact, columns.reset_index(drop=True)], axis=1)
+        return compact
+
+
+def write_saved(path: str, compact: pd.DataFrame) -> None:
+    """ Write the compact saved dataframe (atomic replace) and remove its journal that is now included"""
+    compact.to_pickle(path + '.tmp')
+    os.replace(path + '.tmp', path)
+    try:
+        os.remove(path + JOURNAL_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+
+def append_journal(path: str, appid: list) -> None:
+    """ Append the AppID added to the saved dataframe to its journal"""
+    with open(path + JOURNAL_SUFFIX, 'a', encoding='utf-8') as f:
+        f.write(''.join(f"{i}\n" for i in appid))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_journal(path: str) -> list:
+    """ Read the AppID added to the saved dataframe after its file is written (empty if no journal)"""
+    try:
+        with open(path + JOURNAL_SUFFIX, encoding='utf-8') as f:
+            return [i.strip() for i in f if i.strip()]
+    except FileNotFoundError:
+        return []
 
 
 def to_datetime(date_str):
@@ -92,3 +351,64 @@ def to_datetime(date_str):
     date_obj = pd.to_datetime(date_str, format="%b %Y")
     return date_obj
 
+
+def file_hash(filename: str) -> str:
+    """ Calculate sha256 hash of the file content"""
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def read_cache_hash(filename: str) -> (str, None):
+    """ Read the hash of the csv file from the cache metadata, return None if metadata is missing or outdated"""
+    try:
+        with open(filename + CACHE_META_SUFFIX, 'r') as f:
+            meta = json.load(f)
+        stat = os.stat(filename)
+        if meta['size'] != stat.st_size or meta['mtime'] != stat.st_mtime_ns:
+            return None
+        return meta['hash']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def read_cache(filename: str, mode: str = INGEST_MODE) -> (pd.DataFrame, None):
+    """ Read the cached dataframe of the csv file, return None if cache is missing, corrupted, outdated or
+    written in other mode/ pandas version
+    cache is valid when size and mtime of the csv match, or when only mtime changed but the hash still match"""
+    try:
+        with open(filename + CACHE_META_SUFFIX, 'r') as f:
+            meta = json.load(f)
+        stat = os.stat(filename)
+        if meta.get('version') != CACHE_VERSION or meta['size'] != stat.st_size or meta.get('mode', 'full') != mode:
+            return None
+        # pickle of other pandas version may fail to load or load with different internals
+        if meta.get('pandas') != pd.__version__:
+            return None
+        if meta['mtime'] != stat.st_mtime_ns:
+            if meta['hash'] != file_hash(filename):
+                return None
+            meta['mtime'] = stat.st_mtime_ns
+            with open(filename + CACHE_META_SUFFIX, 'w') as f:
+                json.dump(meta, f)
+        return pd.read_pickle(filename + CACHE_SUFFIX)
+    except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError):
+        # missing, corrupted or incompatible cache is parsed again from the csv
+        return None
+
+
+def write_cache(filename: str, df: pd.DataFrame, mode: str = INGEST_MODE) -> None:
+    """ Write the parsed dataframe as a binary cache next to the csv file (dtypes are kept as-is)"""
+    try:
+        stat = os.stat(filename)
+        meta = {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                'hash': file_hash(filename), 'mode': mode, 'pandas': pd.__version__}
+        df.to_pickle(filename + CACHE_SUFFIX + '.tmp')
+        os.replace(filename + CACHE_SUFFIX + '.tmp', filename + CACHE_SUFFIX)
+        with open(filename + CACHE_META_SUFFIX, 'w') as f:
+            json.dump(meta, f)
+    except OSError:
+        # cache is optional, application still works from the csv
+        pass
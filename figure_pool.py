@@ -0,0 +1,46 @@
+""" Figure pool module for GUI application
+keep one matplotlib figure and tkinter canvas per plot area and reuse them for every plot"""
+
+import tkinter as tk
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+
+class FigurePool:
+    """ Pool of figure canvas by plot area, replotting an area redraws the same figure and canvas
+    instead of creating new figure and tkinter widget"""
+
+    def __init__(self):
+        self.__canvases = {}
+
+    def get_figure(self, area: str) -> (Figure, None):
+        """ Return the figure of the plot area to draw into (None if the area has no figure yet)"""
+        canvas = self.__canvases.get(area)
+        if canvas is None:
+            return None
+        return canvas.figure
+
+    def show(self, area: str, fig: Figure, parent: tk.Misc, **grid) -> FigureCanvasTkAgg:
+        """ Show the figure in the plot area, the canvas is reused when fig is the figure of the area
+        :param area: name of the plot area
+        :param fig: figure to show
+        :param parent: parent widget of the canvas
+        :param grid: grid options of the canvas widget
+        """
+        canvas = self.__canvases.get(area)
+        if canvas is not None and canvas.figure is fig:
+            canvas.draw_idle()
+            return canvas
+        if canvas is not None:
+            canvas.get_tk_widget().destroy()
+        canvas = FigureCanvasTkAgg(fig, parent)
+        canvas.draw()
+        canvas.get_tk_widget().grid(sticky=tk.NSEW, **grid)
+        self.__canvases[area] = canvas
+        return canvas
+
+    def clear(self) -> None:
+        """ Destroy all canvases in the pool"""
+        for canvas in self.__canvases.values():
+            canvas.get_tk_widget().destroy()
+        self.__canvases.clear()
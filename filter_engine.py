@@ -0,0 +1,142 @@
+""" Filter expression module for analysis application
+parse filter conditions and compile them into one boolean mask (no eval)"""
+
+import operator
+import re
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+COMPARISONS = {
+    '<=': operator.le,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '>': operator.gt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+OPERATORS = list(COMPARISONS) + ['contains']
+CONDITION_PATTERN = re.compile(r'^\s*(?P<column>.+?)\s*(?P<op><=|>=|==|!=|<|>|\bcontains\b)\s*(?P<value>.*?)\s*$')
+
+
+def parse_condition(text: str) -> tuple:
+    """ Parse condition text in the form of "<column> <operator> <value>" (e.g. "Peak CCU >= 100")
+    :return: tuple of (column, operator, value)
+    """
+    match = CONDITION_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f"Invalid filter condition: {text}")
+    return match['column'], match['op'], match['value']
+
+
+def convert_value(series: pd.Series, value):
+    """ Convert the value of the condition to the type of the column"""
+    if pd.api.types.is_bool_dtype(series):
+        if str(value).lower() not in ('true', 'false'):
+            raise ValueError(f"{series.name} must be compared with True or False, got {value}")
+        return str(value).lower() == 'true'
+    if pd.api.types.is_numeric_dtype(series):
+        try:
+            if pd.api.types.is_float_dtype(series):
+                # same precision as the column (e.g. float32), so equality compare the same value
+                return series.dtype.type(value)
+            return float(value)
+        except ValueError:
+            raise ValueError(f"{series.name} must be compared with a number, got {value}") from None
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.Timestamp(value)
+    return str(value)
+
+
+def condition_mask(df: pd.DataFrame, column: str, op: str, value, column_filters: dict = None) -> np.ndarray:
+    """ Evaluate one condition into a boolean mask of the dataframe rows
+    :param column_filters: dict of (column, operator) -> function(df, value) returning mask, used instead of
+                           the default evaluation (e.g. for precomputed index)
+    """
+    if column not in df.columns:
+        raise ValueError(f"Unknown column: {column}")
+    if column_filters and (column, op) in column_filters:
+        return column_filters[(column, op)](df, value)
+    series = df[column]
+    if op == 'contains':
+        return series.astype(str).str.contains(str(value), case=False, regex=False).to_numpy(dtype=bool)
+    if op not in COMPARISONS:
+        raise ValueError(f"Unknown operator: {op}")
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # unordered categorical only supports equality, compare the values as strings like other text columns
+        series = series.astype(object)
+    return np.asarray(COMPARISONS[op](series, convert_value(series, value)), dtype=bool)
+
+
+def build_mask(df: pd.DataFrame, conditions: list, column_filters: dict = None) -> np.ndarray:
+    """ Combine all conditions into one boolean mask (rows that satisfied every condition)
+    :param df: dataframe to filter
+    :param conditions: list of (column, operator, value) tuples or condition text
+    :param column_filters: dict of (column, operator) -> function(df, value), see condition_mask
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for condition in conditions:
+        if isinstance(condition, str):
+            condition = parse_condition(condition)
+        mask &= condition_mask(df, *condition, column_filters=column_filters)
+    return mask
+
+
+def normalize_conditions(conditions: list) -> tuple:
+    """ Normalize conditions into tuple of (column, operator, value) string tuples (used as cache key)"""
+    normalized = []
+    for condition in conditions:
+        if isinstance(condition, str):
+            condition = parse_condition(condition)
+        column, op, value = condition
+        normalized.append((str(column).strip(), str(op).strip(), str(value).strip()))
+    return tuple(normalized)
+
+
+class FilterCache:
+    """ LRU cache of filter masks keyed by (dataframe key, filter list prefix), bounded by memory
+    a filter list that extends a cached one only evaluates the new conditions"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, column_filters: dict = None):
+        self.__max_bytes = max_bytes
+        self.__column_filters = column_filters
+        self.__bytes = 0
+        self.__cache = OrderedDict()
+
+    def get_mask(self, key, df: pd.DataFrame, conditions: list) -> np.ndarray:
+        """ Return the mask of the rows that satisfied all conditions, reuse the longest cached prefix
+        :param key: key of the dataframe (must change when the dataframe content changes)
+        :param df: dataframe to filter
+        :param conditions: list of (column, operator, value) tuples or condition text
+        """
+        conditions = normalize_conditions(conditions)
+        mask = np.ones(len(df), dtype=bool)
+        start = 0
+        for i in range(len(conditions), 0, -1):
+            cached = self.__cache.get((key, conditions[:i]))
+            if cached is not None:
+                self.__cache.move_to_end((key, conditions[:i]))
+                mask, start = cached, i
+                break
+        for i in range(start, len(conditions)):
+            mask = mask & condition_mask(df, *conditions[i], column_filters=self.__column_filters)
+            self.__put((key, conditions[:i + 1]), mask)
+        return mask
+
+    def clear(self) -> None:
+        """ Remove all cached masks"""
+        self.__cache.clear()
+        self.__bytes = 0
+
+    def __put(self, key, mask: np.ndarray) -> None:
+        """ Add the mask to the cache and evict the least recently used masks over the memory bound"""
+        if mask.nbytes > self.__max_bytes:
+            return
+        if key in self.__cache:
+            self.__bytes -= self.__cache.pop(key).nbytes
+        mask.flags.writeable = False
+        self.__cache[key] = mask
+        self.__bytes += mask.nbytes
+        while self.__bytes > self.__max_bytes:
+            _, evicted = self.__cache.popitem(last=False)
+            self.__bytes -= evicted.nbytes
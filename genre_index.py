@@ -0,0 +1,71 @@
+""" Genre index module for analysis application
+multi-hot genre membership matrix built once from the raw data"""
+
+import re
+import numpy as np
+import pandas as pd
+
+
+class GenreIndex:
+    """ Bit-packed genre membership matrix of the raw data (one bit row per genre)
+    genre filters become bitwise operations and genre counts become row sums"""
+
+    def __init__(self, appid: pd.Series, genres: pd.Series, sep: str = ','):
+        self.__sep = sep
+        self.__size = len(genres)
+        self.__appid = pd.Index(appid.astype(str))
+        if not self.__appid.is_unique:
+            self.__appid = None
+        # object first, categorical column can not be filled with value that is not a category
+        split = genres.astype(object).fillna('').astype(str).str.split(sep)
+        exploded = split.explode().str.strip()
+        rows = np.repeat(np.arange(self.__size), split.str.len().to_numpy())
+        valid = (exploded != '').to_numpy()
+        codes, uniques = pd.factorize(exploded[valid], sort=True)
+        self.__genres = [str(i) for i in uniques]
+        self.__position = {genre.lower(): i for i, genre in enumerate(self.__genres)}
+        matrix = np.zeros((len(self.__genres), self.__size), dtype=bool)
+        matrix[codes, rows[valid]] = True
+        self.__counts = matrix.sum(axis=1)
+        self.__packed = np.packbits(matrix, axis=1)
+
+    def get_genres(self) -> list:
+        """ Return the list of unique genres (sorted)"""
+        return list(self.__genres)
+
+    def raw_mask(self, genre: str) -> np.ndarray:
+        """ Return the boolean mask of the raw data rows that have the genre (exact, case-insensitive)"""
+        try:
+            packed = self.__packed[self.__position[str(genre).strip().lower()]]
+        except KeyError:
+            return np.zeros(self.__size, dtype=bool)
+        return np.unpackbits(packed, count=self.__size).astype(bool)
+
+    def mask(self, df: pd.DataFrame, genre: str) -> np.ndarray:
+        """ Return the boolean mask of the dataframe rows that have the genre (dataframe rows are matched
+        to the raw data by AppID, the Genres column of the dataframe is used if it has unknown AppID)"""
+        positions = self.__positions(df)
+        if positions is None:
+            pattern = f"(?:^|{re.escape(self.__sep)})\\s*{re.escape(str(genre).strip())}\\s*(?:{re.escape(self.__sep)}|$)"
+            return df['Genres'].astype(str).str.contains(pattern, case=False, regex=True).to_numpy(dtype=bool)
+        return self.raw_mask(genre)[positions]
+
+    def counts(self, df: pd.DataFrame = None) -> pd.Series:
+        """ Return the number of games in each genre (of the dataframe rows, or all raw data if None)"""
+        if df is None:
+            return pd.Series(self.__counts, index=self.__genres, name='Count')
+        positions = self.__positions(df)
+        if positions is None:
+            exploded = df['Genres'].astype(str).str.split(self.__sep).explode().str.strip()
+            return exploded[exploded != ''].value_counts().rename('Count')
+        bits = np.unpackbits(self.__packed, axis=1, count=self.__size)
+        return pd.Series(bits[:, positions].sum(axis=1), index=self.__genres, name='Count')
+
+    def __positions(self, df: pd.DataFrame) -> (np.ndarray, None):
+        """ Return the raw data row positions of the dataframe rows (None if any AppID is unknown)"""
+        if self.__appid is None:
+            return None
+        positions = self.__appid.get_indexer(df['AppID'].astype(str))
+        if (positions < 0).any():
+            return None
+        return positions
@@ -0,0 +1,95 @@
+""" Histogram module for analysis application
+compute histogram counts with bounded number of bins and cache the quantile summary of each column"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+MAX_BINS = 200
+
+
+def quantile_summary(data: pd.Series) -> dict:
+    """ Summary of the data used for the histogram range and bin width (count, min, max, q1, q3)"""
+    values = data.dropna().to_numpy(dtype=float)
+    if len(values) == 0:
+        return {'count': 0, 'min': 0.0, 'max': 0.0, 'q1': 0.0, 'q3': 0.0}
+    q1, q3 = np.quantile(values, [0.25, 0.75])
+    return {'count': len(values), 'min': values.min(), 'max': values.max(), 'q1': q1, 'q3': q3}
+
+
+def histogram_range(summary: dict) -> tuple:
+    """ Range of the histogram, outliers outside 1.5 IQR are removed
+    :return: tuple of (lower bound, upper bound)
+    """
+    iqr = summary['q3'] - summary['q1']
+    lower_bound = max(summary['q1'] - 1.5 * iqr, summary['min'])
+    upper_bound = min(summary['q3'] + 1.5 * iqr, summary['max'])
+    return lower_bound, upper_bound
+
+
+def bin_count(summary: dict, max_bins: int = MAX_BINS) -> int:
+    """ Number of bins by Freedman-Diaconis rule (bin width 2 IQR / cube root of count),
+    Sturges rule if IQR is zero, at most max_bins"""
+    lower_bound, upper_bound = histogram_range(summary)
+    count = summary['count']
+    iqr = summary['q3'] - summary['q1']
+    if count == 0 or upper_bound <= lower_bound:
+        return 1
+    if iqr > 0:
+        bins = np.ceil((upper_bound - lower_bound) / (2 * iqr / np.cbrt(count)))
+    else:
+        bins = np.ceil(np.log2(count)) + 1
+    return int(min(max(bins, 1), max_bins))
+
+
+def histogram(data: pd.Series, summary: dict = None, bins: int = None, max_bins: int = MAX_BINS) -> dict:
+    """ Calculate the histogram counts and bin edges of the data (outliers outside 1.5 IQR are removed)
+    :param summary: quantile summary of the data (computed if not given)
+    :param bins: number of bins (chosen by bin_count if not given)
+    :return: dictionary of counts and edges
+    """
+    if summary is None:
+        summary = quantile_summary(data)
+    if not bins:
+        bins = bin_count(summary, max_bins)
+    counts, edges = np.histogram(data.dropna().to_numpy(dtype=float), bins=bins, range=histogram_range(summary))
+    return {'counts': counts, 'edges': edges}
+
+
+class HistogramEngine:
+    """ Histogram calculation with LRU cache of the quantile summary by (dataframe key, column)
+    repeated histograms of the same data only count the values into bins"""
+
+    def __init__(self, max_bins: int = MAX_BINS, size: int = 128):
+        self.__max_bins = max_bins
+        self.__size = size
+        self.__lock = threading.Lock()
+        self.__summaries = OrderedDict()
+
+    def summary(self, data: pd.Series, key=None) -> dict:
+        """ Get the quantile summary of the data
+        :param key: key of the dataframe of the data (must change when the content changes), not cached if None
+        """
+        if key is None:
+            return quantile_summary(data)
+        with self.__lock:
+            summary = self.__summaries.get((key, data.name))
+            if summary is not None:
+                self.__summaries.move_to_end((key, data.name))
+                return summary
+        summary = quantile_summary(data)
+        with self.__lock:
+            self.__summaries[(key, data.name)] = summary
+            while len(self.__summaries) > self.__size:
+                self.__summaries.popitem(last=False)
+        return summary
+
+    def histogram(self, data: pd.Series, key=None, bins: int = None) -> dict:
+        """ Calculate the histogram counts and bin edges of the data, see histogram and summary"""
+        return histogram(data, self.summary(data, key), bins, self.__max_bins)
+
+    def clear(self) -> None:
+        """ Remove all cached summaries"""
+        with self.__lock:
+            self.__summaries.clear()
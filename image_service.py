@@ -0,0 +1,184 @@
+""" Image service module for analysis application
+download the header images with a pooled session, cache them in memory and on disk and prefetch in background"""
+
+import os
+import hashlib
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image
+
+IMAGE_CACHE_SUFFIX = '.images'
+# (connect, read) timeout of the image request in seconds
+IMAGE_TIMEOUT = (3.05, 10)
+
+
+class ImageService:
+    """ Image loader with LRU cache of decoded images (bounded by memory) and content-addressed disk cache
+    the disk cache stores each image content once under its sha256 (objects) and a reference file of each
+    url (refs) that contains the hash of its content"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 64 * 1024 * 1024, max_workers: int = 4,
+                 timeout: tuple = IMAGE_TIMEOUT):
+        self.__cache_dir = cache_dir
+        self.__max_bytes = max_bytes
+        self.__timeout = timeout
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.__session.mount('http://', adapter)
+        self.__session.mount('https://', adapter)
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.__lock = threading.Lock()
+        # url -> (decoded image, size in bytes)
+        self.__images = OrderedDict()
+        self.__bytes = 0
+        # url -> future of the image that is loading (prefetch or get)
+        self.__loading = {}
+        # url -> future of the prefetch that may still be waiting in the pool
+        self.__queued = {}
+
+    def get(self, url: str) -> Image:
+        """ Get the image of the url from memory, disk or network in the calling thread
+        waits only for a load of the same url that already started, a prefetch of the url that is still
+        waiting in the pool is cancelled and loaded here instead"""
+        with self.__lock:
+            cached = self.__images.get(url)
+            if cached is not None:
+                self.__images.move_to_end(url)
+                return cached[0]
+            future = self.__loading.get(url)
+            queued = self.__queued.pop(url, None)
+            if queued is not None and queued.cancel():
+                future = None
+            if future is None:
+                future = Future()
+                self.__loading[url] = future
+                loading = True
+            else:
+                loading = False
+        if not loading:
+            return future.result()
+        try:
+            image = self.__load(url)
+            future.set_result(image)
+            return image
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.__lock:
+                self.__loading.pop(url, None)
+
+    def prefetch(self, urls: list) -> None:
+        """ Load the images of the urls in background (not loaded again if cached or loading)
+        the older prefetches that are still waiting in the pool are cancelled"""
+        with self.__lock:
+            self.__cancel_queued()
+            for url in urls:
+                if url in self.__images or url in self.__loading:
+                    continue
+                future = self.__pool.submit(self.__prefetch, url)
+                self.__loading[url] = future
+                self.__queued[url] = future
+
+    def cancel_prefetch(self) -> None:
+        """ Cancel the prefetches that are still waiting in the pool"""
+        with self.__lock:
+            self.__cancel_queued()
+
+    def clear(self) -> None:
+        """ Remove all images from memory (disk cache is kept)"""
+        with self.__lock:
+            self.__images.clear()
+            self.__bytes = 0
+
+    def shutdown(self) -> None:
+        """ Cancel the prefetch that not started and close the session"""
+        self.__pool.shutdown(wait=False, cancel_futures=True)
+        self.__session.close()
+
+    def __cancel_queued(self) -> None:
+        """ Cancel the prefetches that not started (call with lock)"""
+        for url, future in self.__queued.items():
+            if future.cancel():
+                self.__loading.pop(url, None)
+        self.__queued.clear()
+
+    def __prefetch(self, url: str) -> Image:
+        """ Thread worker for prefetch, the url is removed from loading when done"""
+        with self.__lock:
+            self.__queued.pop(url, None)
+        try:
+            return self.__load(url)
+        finally:
+            with self.__lock:
+                self.__loading.pop(url, None)
+
+    def __load(self, url: str) -> Image:
+        """ Read the image from disk cache (download if not exist), decode and put it into memory cache"""
+        content = self.__read(url)
+        if content is None:
+            response = self.__session.get(url, timeout=self.__timeout)
+            response.raise_for_status()
+            content = response.content
+            self.__write(url, content)
+        image = Image.open(BytesIO(content))
+        image.load()
+        self.__put(url, image)
+        return image
+
+    def __put(self, url: str, image: Image) -> None:
+        """ Add the image to the memory cache and evict the least recently used images over the memory bound"""
+        size = image.width * image.height * len(image.getbands())
+        if size > self.__max_bytes:
+            return
+        with self.__lock:
+            if url in self.__images:
+                return
+            self.__images[url] = (image, size)
+            self.__bytes += size
+            while self.__bytes > self.__max_bytes:
+                _, (_, evicted) = self.__images.popitem(last=False)
+                self.__bytes -= evicted
+
+    def __ref_path(self, url: str) -> str:
+        """ Path of the reference file of the url"""
+        return os.path.join(self.__cache_dir, 'refs', hashlib.sha256(url.encode()).hexdigest())
+
+    def __read(self, url: str) -> (bytes, None):
+        """ Read the image content of the url from disk cache (None if not cached)"""
+        try:
+            with open(self.__ref_path(url), encoding='utf-8') as f:
+                digest = f.read().strip()
+            with open(os.path.join(self.__cache_dir, 'objects', digest), 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        if hashlib.sha256(content).hexdigest() != digest:
+            return None
+        return content
+
+    def __write(self, url: str, content: bytes) -> None:
+        """ Write the image content to disk cache (content stored once by its hash, atomic replace)"""
+        digest = hashlib.sha256(content).hexdigest()
+        try:
+            os.makedirs(os.path.join(self.__cache_dir, 'objects'), exist_ok=True)
+            os.makedirs(os.path.join(self.__cache_dir, 'refs'), exist_ok=True)
+            path = os.path.join(self.__cache_dir, 'objects', digest)
+            if not os.path.exists(path):
+                self.__replace(path, content)
+            self.__replace(self.__ref_path(url), digest.encode())
+        except OSError:
+            # cache is optional, image will be downloaded again
+            pass
+
+    @staticmethod
+    def __replace(path: str, content: bytes) -> None:
+        """ Write the file through a temporary file of this thread and replace (atomic)"""
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(content)
+        os.replace(temp, path)
@@ -0,0 +1,168 @@
+""" Ingestion module for analysis application
+read the dataset csv in chunks with only the needed columns and compact dtypes,
+and stream aggregates over the chunks without holding the whole file in memory"""
+
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CHUNK_SIZE = 20000
+# 'full' reads every column with default dtypes, 'reduced' reads the used columns with compact dtypes
+INGEST_MODE = 'reduced'
+# non-numeric columns used by the application
+USED_COLUMNS = ['AppID', 'Name', 'Release date', 'Estimated owners', 'Header image', 'Publishers', 'Genres',
+                'Windows', 'Mac', 'Linux']
+# numeric columns of the dataset, listed instead of detected from the values
+# (a text column that is empty in the first rows would be detected as numeric)
+NUMERIC_COLUMNS = ['Peak CCU', 'Required age', 'Price', 'Discount', 'DLC count', 'Metacritic score', 'User score',
+                   'Positive', 'Negative', 'Score rank', 'Achievements', 'Recommendations',
+                   'Average playtime forever', 'Average playtime two weeks', 'Median playtime forever',
+                   'Median playtime two weeks']
+# repeated strings stored as categorical in reduced mode
+CATEGORY_COLUMNS = ['Estimated owners', 'Publishers', 'Genres']
+
+
+def to_datetime_column(dates: pd.Series) -> pd.Series:
+    """ Vectorized version of to_datetime, parse the whole column once per date format
+    rows that not match "%b %d, %Y" are parsed again with "%b %Y" (raise ValueError if still not match)"""
+    full_date = pd.to_datetime(dates, format="%b %d, %Y", errors='coerce')
+    remaining = full_date.isna() & dates.notna()
+    if remaining.any():
+        full_date[remaining] = pd.to_datetime(dates[remaining], format="%b %Y")
+    return full_date
+
+
+def read_header(filename: str) -> list:
+    """ Columns of the dataset csv (only the header is read)"""
+    return pd.read_csv(filename, nrows=0).columns.to_list()
+
+
+def select_columns(filename: str) -> list:
+    """ Columns read in reduced mode, the used columns and the numeric columns that exist in the file"""
+    return [i for i in read_header(filename) if i in USED_COLUMNS or i in NUMERIC_COLUMNS]
+
+
+def compact(chunk: pd.DataFrame) -> pd.DataFrame:
+    """ Convert the chunk to compact dtypes (int64 to int32 when in range, float64 to float32 when every value
+    is exact in float32, repeated strings to categorical), integers are not downcast below int32 so sums of
+    columns do not overflow, and prices stay float64 so they are not displayed as 4.570000171661377"""
+    for column in chunk.columns:
+        series = chunk[column]
+        if pd.api.types.is_integer_dtype(series):
+            info = np.iinfo(np.int32)
+            if series.empty or (series.min() >= info.min and series.max() <= info.max):
+                chunk[column] = series.astype(np.int32)
+        elif pd.api.types.is_float_dtype(series):
+            values = series.to_numpy(dtype=np.float64)
+            if np.array_equal(values.astype(np.float32), values, equal_nan=True):
+                chunk[column] = series.astype(np.float32)
+        elif column in CATEGORY_COLUMNS:
+            chunk[column] = series.astype('category')
+    return chunk
+
+
+def prepare(chunk: pd.DataFrame) -> pd.DataFrame:
+    """ Parse the columns of the chunk that the application uses as other type (AppID as str, date)"""
+    if 'AppID' in chunk:
+        chunk['AppID'] = chunk['AppID'].astype(str)
+    if 'Release date' in chunk:
+        chunk['Release date'] = to_datetime_column(chunk['Release date'])
+    return chunk
+
+
+def iter_chunks(filename: str, columns: list = None, chunksize: int = CHUNK_SIZE, compact_dtypes: bool = True):
+    """ Read the csv file in chunks of prepared dataframe
+    :param columns: columns to read (all columns if None)
+    :param compact_dtypes: convert each chunk to compact dtypes
+    """
+    for chunk in pd.read_csv(filename, usecols=columns, chunksize=chunksize):
+        chunk = prepare(chunk)
+        yield compact(chunk) if compact_dtypes else chunk
+
+
+def read_dataset(filename: str, mode: str = INGEST_MODE, chunksize: int = CHUNK_SIZE) -> pd.DataFrame:
+    """ Read the whole dataset, 'full' mode reads all columns at once, 'reduced' mode reads the used columns
+    in chunks with compact dtypes"""
+    if mode == 'full':
+        return prepare(pd.read_csv(filename))
+    if mode != 'reduced':
+        raise ValueError(f"Unknown ingestion mode: {mode}")
+    chunks = list(iter_chunks(filename, select_columns(filename), chunksize))
+    # categories are different in each chunk and concat turns them back to object,
+    # so the categorical columns are combined with the union of the categories instead
+    categories = {column: union_categoricals([i[column] for i in chunks])
+                  for column in CATEGORY_COLUMNS if column in chunks[0]}
+    df = pd.concat([i.drop(columns=list(categories)) for i in chunks], ignore_index=True)
+    for column, values in categories.items():
+        df[column] = values
+    return df[chunks[0].columns]
+
+
+def stream_yearly_counts(filename: str, chunksize: int = CHUNK_SIZE) -> pd.Series:
+    """ Number of games released each year, counted over the chunks"""
+    counts = pd.Series(dtype=np.int64)
+    for chunk in iter_chunks(filename, ['Release date'], chunksize):
+        counts = counts.add(chunk['Release date'].dt.year.value_counts(), fill_value=0)
+    return counts.sort_index().astype(np.int64)
+
+
+def stream_histogram(filename: str, column: str, bins: int = 50, value_range: tuple = None,
+                     chunksize: int = CHUNK_SIZE) -> dict:
+    """ Histogram of the column counted over the chunks
+    :param value_range: range of the bins, (min, max) of the column from an extra pass if None
+                        (quantiles are not known without holding the column, so outliers are not removed)
+    :return: dictionary of counts and edges
+    """
+    if value_range is None:
+        low, high = np.inf, -np.inf
+        for chunk in iter_chunks(filename, [column], chunksize):
+            low, high = min(low, chunk[column].min()), max(high, chunk[column].max())
+        value_range = (low, high)
+    edges = np.histogram_bin_edges([], bins=bins, range=value_range)
+    counts = np.zeros(bins, dtype=np.int64)
+    for chunk in iter_chunks(filename, [column], chunksize):
+        counts += np.histogram(chunk[column].dropna().to_numpy(dtype=float), bins=edges)[0]
+    return {'counts': counts, 'edges': edges}
+
+
+def stream_genre_counts(filename: str, sep: str = ',', chunksize: int = CHUNK_SIZE) -> pd.Series:
+    """ Number of games in each genre, counted over the chunks"""
+    counts = pd.Series(dtype=np.int64)
+    for chunk in iter_chunks(filename, ['Genres'], chunksize, compact_dtypes=False):
+        genres = chunk['Genres'].dropna().astype(str).str.split(sep).explode().str.strip()
+        counts = counts.add(genres[genres != ''].value_counts(), fill_value=0)
+    return counts.sort_values(ascending=False).astype(np.int64).rename('Count')
+
+
+def measure(function, *args) -> tuple:
+    """ Run the function and measure it
+    :return: tuple of (result, peak memory allocated in bytes, time in seconds)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak, time.perf_counter() - start
+
+
+def report_memory(filename: str) -> None:
+    """ Print the peak memory and time of reading the dataset in each mode and of the streaming aggregates"""
+    for mode in ('full', 'reduced'):
+        df, peak, seconds = measure(read_dataset, filename, mode)
+        size = df.memory_usage(deep=True).sum()
+        print(f"{mode:>8}: peak {peak / 2 ** 20:,.1f} MiB, dataframe {size / 2 ** 20:,.1f} MiB, "
+              f"{len(df.columns)} columns, {seconds:.2f} s")
+        del df
+    for name, function in (('yearly', stream_yearly_counts), ('genres', stream_genre_counts)):
+        _, peak, seconds = measure(function, filename)
+        print(f"{name:>8}: peak {peak / 2 ** 20:,.1f} MiB (streamed), {seconds:.2f} s")
+
+
+if __name__ == '__main__':
+    report_memory(sys.argv[1] if len(sys.argv) > 1 else 'game_market_data.csv')
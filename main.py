@@ -1,4 +1,6 @@
+import logging
 from analysis_gui import AnalysisGUI
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
 gui = AnalysisGUI("game_market_data.csv")
 gui.run()
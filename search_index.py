@@ -0,0 +1,182 @@
+""" Module for searching the games by AppID and Name
+the index is built once from the raw data and reused for every query"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+SEPARATOR = '\x00'
+CACHE_SIZE = 64
+# n-grams of 1 to GRAM_SIZE characters are indexed, longer queries intersect the rows of their n-grams
+GRAM_SIZE = 3
+EMPTY = np.array([], dtype=np.int64)
+
+
+class NgramIndex:
+    """ Index of the n-grams (1 to GRAM_SIZE characters) of lowercase values, each n-gram has the sorted array
+    of the rows that contain it and the first position of the n-gram in each of those rows"""
+
+    def __init__(self, values: list, size: int = GRAM_SIZE):
+        self.__values = values
+        self.__size = size
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        starts = np.zeros(len(values), dtype=np.int64)
+        starts[1:] = np.cumsum(lengths + 1)[:-1]
+        # every value joined with separator, n-grams that contain the separator are not indexed
+        codes = np.frombuffer(SEPARATOR.join(values).encode('utf-32-le'), dtype=np.uint32)
+        # characters are numbered 1 to alphabet size (separator is 0), so an n-gram and its offset fit one integer
+        alphabet, codes = np.unique(np.r_[np.uint32(0), codes], return_inverse=True)
+        codes = codes[1:].astype(np.uint64)
+        self.__alphabet = {chr(c): i for i, c in enumerate(alphabet.tolist()) if i > 0}
+        self.__char_bits = np.uint64(len(alphabet).bit_length())
+        row_of = np.repeat(np.arange(len(values), dtype=np.int64), lengths + 1)[:len(codes)]
+        self.__position_type = np.uint16 if lengths.max(initial=0) < 2 ** 16 else np.int32
+        # n -> (sorted n-gram keys, bounds of the rows of each key, rows, first positions)
+        self.__grams = [self.__build(codes, row_of, starts, n) for n in range(1, size + 1)]
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __build(self, codes: np.ndarray, row_of: np.ndarray, starts: np.ndarray, n: int) -> tuple:
+        """ Build the postings of the n-grams of n characters (vectorized over the joined values)"""
+        count = max(len(codes) - n + 1, 0)
+        keys = np.zeros(count, dtype=np.uint64)
+        valid = np.ones(count, dtype=bool)
+        for i in range(n):
+            part = codes[i:i + count]
+            keys = (keys << self.__char_bits) | part
+            valid &= part != 0
+        offsets = np.flatnonzero(valid).astype(np.uint64)
+        keys = keys[valid]
+        # sorted by (n-gram, offset in the joined values), so the rows of each n-gram are sorted
+        # and the first position of the n-gram in each row comes first
+        offset_bits = np.uint64(max(len(codes), 1).bit_length())
+        if int(self.__char_bits) * n + int(offset_bits) <= 64:
+            packed = np.sort((keys << offset_bits) | offsets)
+            keys, offsets = packed >> offset_bits, packed & ((np.uint64(1) << offset_bits) - np.uint64(1))
+        else:
+            order = np.lexsort((offsets, keys))
+            keys, offsets = keys[order], offsets[order]
+        offsets = offsets.astype(np.int64)
+        rows = row_of[offsets]
+        # one entry of each (n-gram, row)
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+        keys, rows, offsets = keys[first], rows[first], offsets[first]
+        changed = np.ones(len(keys), dtype=bool)
+        changed[1:] = keys[1:] != keys[:-1]
+        bounds = np.r_[np.flatnonzero(changed), len(keys)]
+        return keys[changed], bounds, rows.astype(np.int32), (offsets - starts[rows]).astype(self.__position_type)
+
+    def postings(self, gram: str) -> (np.ndarray, np.ndarray):
+        """ Rows (sorted) that contain the n-gram and the first position of the n-gram in each row"""
+        keys, bounds, rows, positions = self.__grams[len(gram) - 1]
+        key = 0
+        for i in gram:
+            if i not in self.__alphabet:
+                return EMPTY, EMPTY
+            key = (key << int(self.__char_bits)) | self.__alphabet[i]
+        i = np.searchsorted(keys, np.uint64(key))
+        if i == len(keys) or keys[i] != key:
+            return EMPTY, EMPTY
+        return rows[bounds[i]:bounds[i + 1]], positions[bounds[i]:bounds[i + 1]]
+
+    def find(self, query: str, candidates: np.ndarray = None) -> (np.ndarray, np.ndarray):
+        """ Find rows containing query, return sorted row positions and the position of the match inside the row
+        :param candidates: sorted rows that may contain query (e.g. rows of a shorter query), all rows if None
+        """
+        if len(query) <= self.__size:
+            rows, positions = self.postings(query)
+            if candidates is not None:
+                _, index, _ = np.intersect1d(rows, candidates, assume_unique=True, return_indices=True)
+                rows, positions = rows[index], positions[index]
+            return rows, positions
+        # rows must contain every n-gram of the query, the rarest n-grams are intersected first
+        grams = {query[i:i + self.__size] for i in range(len(query) - self.__size + 1)}
+        postings = sorted((self.postings(i)[0] for i in grams), key=len)
+        rows = postings[0] if candidates is None else np.intersect1d(postings[0], candidates, assume_unique=True)
+        for i in postings[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, i, assume_unique=True)
+        # n-grams may be in other order or apart, the remaining rows are checked
+        found = np.array([self.__values[i].find(query) for i in rows.tolist()], dtype=np.int64)
+        matched = found >= 0
+        return rows[matched], found[matched].astype(np.int32)
+
+
+class SearchIndex:
+    """ Literal (non-regex) case-insensitive substring/prefix search over AppID and Name
+    search can be called from several threads, the index is read-only and the cache is locked"""
+    def __init__(self, appid: pd.Series, name: pd.Series):
+        names = name.fillna('').astype(str).str.lower().str.replace(SEPARATOR, ' ').tolist()
+        appids = appid.astype(str).str.lower().tolist()
+        self.__name_len = np.fromiter(map(len, names), dtype=np.int64, count=len(names))
+        self.__appid_len = np.fromiter(map(len, appids), dtype=np.int64, count=len(appids))
+        self.__names = NgramIndex(names)
+        self.__appids = NgramIndex(appids)
+        # ranking key of a row is ((not exact, match position), name length, row) packed into one integer
+        self.__max_len = int(max(self.__name_len.max(initial=0), self.__appid_len.max(initial=0))) + 1
+        # LRU of query -> all matched rows and positions (name and AppID), used directly or narrowed by longer queries
+        self.__cache = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__names)
+
+    def __narrow_from(self, query: str) -> (np.ndarray, None):
+        """ Get the rows matched by the longest previous query contained in query
+        (rows that contain query must contain that previous query too), call with lock"""
+        best = None
+        for cached in self.__cache:
+            if cached in query and (best is None or len(cached) > len(best)):
+                best = cached
+        if best is None:
+            return None
+        name_rows, _, id_rows, _ = self.__cache[best]
+        return np.union1d(name_rows, id_rows)
+
+    def search(self, query: str, limit: int = None) -> np.ndarray:
+        """ Search the rows which AppID or Name contains query (case-insensitive, not regex)
+        return row positions ranked by exact match, match position (prefix first) then name length
+        :param query: the query to search
+        :param limit: maximum number of rows to return (None for all)
+        """
+        query = str(query).lower()
+        if query == '' or SEPARATOR in query:
+            return EMPTY
+        with self.__lock:
+            matches = self.__cache.get(query)
+            if matches is not None:
+                self.__cache.move_to_end(query)
+            else:
+                candidates = self.__narrow_from(query)
+        if matches is None:
+            # finding only reads the index, other searches run meanwhile
+            matches = (*self.__names.find(query, candidates), *self.__appids.find(query, candidates))
+            with self.__lock:
+                self.__cache[query] = matches
+                self.__cache.move_to_end(query)
+                while len(self.__cache) > CACHE_SIZE:
+                    self.__cache.popitem(last=False)
+        return self.__rank(query, *matches, limit)
+
+    def __rank(self, query: str, name_rows: np.ndarray, name_pos: np.ndarray, id_rows: np.ndarray,
+               id_pos: np.ndarray, limit: int = None) -> np.ndarray:
+        """ Rank the matched rows, only the best limit rows are sorted"""
+        name_key = self.__rank_key(name_rows, name_pos, self.__name_len[name_rows] == len(query))
+        id_key = self.__rank_key(id_rows, id_pos, self.__appid_len[id_rows] == len(query))
+        # keep the best ranked entry of the rows that match both AppID and Name
+        _, name_index, id_index = np.intersect1d(name_rows, id_rows, assume_unique=True, return_indices=True)
+        name_key[name_index] = np.minimum(name_key[name_index], id_key[id_index])
+        keys = np.concatenate([name_key, np.delete(id_key, id_index)])
+        if limit is not None and limit < len(keys):
+            keys = keys[np.argpartition(keys, limit - 1)[:limit]] if limit > 0 else keys[:0]
+        keys.sort()
+        return keys % len(self)
+
+    def __rank_key(self, rows: np.ndarray, positions: np.ndarray, same_length: np.ndarray) -> np.ndarray:
+        """ Ranking key of the matched rows (smaller is better)"""
+        not_exact = ~(same_length & (positions == 0))
+        return ((not_exact * self.__max_len + positions) * self.__max_len + self.__name_len[rows]) * len(self) + rows
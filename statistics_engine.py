@@ -0,0 +1,108 @@
+""" Statistics module for analysis application
+compute the descriptive statistics of columns in one pass and cache them by (dataframe key, column)"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def sorted_quantile(values: np.ndarray, count: np.ndarray, q: float) -> np.ndarray:
+    """ Quantile of each column of the sorted values (linear interpolation, same as pandas)
+    :param values: 2d array sorted along axis 0, missing values at the end of each column
+    :param count: number of non-missing values of each column
+    """
+    position = q * np.maximum(count - 1, 0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+    columns = np.arange(values.shape[1])
+    fraction = position - lower
+    return values[lower, columns] * (1 - fraction) + values[upper, columns] * fraction
+
+
+def sorted_mode(values: np.ndarray) -> tuple:
+    """ Mode of the sorted values without missing values (smallest value if tie, same as pandas)
+    :return: tuple of (mode, count of the mode)
+    """
+    if len(values) == 0:
+        return np.nan, 0
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    i = counts.argmax()
+    return values[starts[i]], int(counts[i])
+
+
+def describe(df: pd.DataFrame, columns: list) -> dict:
+    """ Calculate the descriptive statistics of the columns, all columns are sorted once together
+    (min, max, median and quartiles are read from the sorted values)
+    :return: dictionary of column -> dictionary of count, min, max, mean, median, mode, mode count, std, var,
+             q1, q3 and iqr
+    """
+    if not columns:
+        return {}
+    values = np.sort(df[columns].to_numpy(dtype=float), axis=0)
+    count = (~np.isnan(values)).sum(axis=0)
+    valid = count > 0
+    last = np.maximum(count - 1, 0)
+    index = np.arange(len(columns))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(values, axis=0) / count
+        var = np.nansum((values - mean) ** 2, axis=0) / (count - 1)
+    if len(values) == 0:
+        low = high = q1 = median = q3 = np.full(len(columns), np.nan)
+    else:
+        low = values[0]
+        high = values[last, index]
+        q1 = sorted_quantile(values, count, 0.25)
+        median = sorted_quantile(values, count, 0.5)
+        q3 = sorted_quantile(values, count, 0.75)
+    result = {}
+    for i, column in enumerate(columns):
+        mode, mode_count = sorted_mode(values[:count[i], i])
+        if valid[i] and pd.api.types.is_integer_dtype(df[column]):
+            mode = int(mode)
+        stats = {'count': int(count[i]), 'min': low[i], 'max': high[i], 'mean': mean[i], 'median': median[i],
+                 'mode': mode, 'mode count': mode_count, 'std': np.sqrt(var[i]), 'var': var[i],
+                 'q1': q1[i], 'q3': q3[i], 'iqr': q3[i] - q1[i]}
+        if not valid[i]:
+            stats.update({name: np.nan for name in stats if name not in ('count', 'mode count')})
+        result[column] = stats
+    return result
+
+
+class StatisticsEngine:
+    """ Descriptive statistics with LRU cache by (dataframe key, column)
+    only the columns that are not cached are computed (together in one pass)"""
+
+    def __init__(self, size: int = 256):
+        self.__size = size
+        self.__lock = threading.Lock()
+        self.__cache = OrderedDict()
+
+    def describe(self, df: pd.DataFrame, columns: list, key=None) -> dict:
+        """ Get the descriptive statistics of the columns, see describe
+        :param key: key of the dataframe (must change when the content changes), not cached if None
+        """
+        if key is None:
+            return describe(df, columns)
+        result = {}
+        with self.__lock:
+            for column in columns:
+                stats = self.__cache.get((key, column))
+                if stats is not None:
+                    self.__cache.move_to_end((key, column))
+                    result[column] = stats
+        missing = [i for i in columns if i not in result]
+        computed = describe(df, missing)
+        with self.__lock:
+            for column, stats in computed.items():
+                self.__cache[(key, column)] = stats
+            while len(self.__cache) > self.__size:
+                self.__cache.popitem(last=False)
+        result.update(computed)
+        return {i: result[i] for i in columns}
+
+    def clear(self) -> None:
+        """ Remove all cached statistics"""
+        with self.__lock:
+            self.__cache.clear()
@@ -0,0 +1,109 @@
+""" Task scheduler module for GUI application
+run long-running tasks in background threads and deliver the results on the tkinter thread"""
+
+import time
+import queue
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import tkinter as tk
+
+logger = logging.getLogger(__name__)
+
+
+class TaskScheduler:
+    """ Run tasks in a thread pool, completion callbacks are called on the tkinter thread (polled with after)
+    submitting a task with the same name as a pending task cancels the older one"""
+
+    def __init__(self, root: tk.Misc, max_workers: int = 4, poll_interval: int = 20, history: int = 100):
+        self.__root = root
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers)
+        # tasks that mutate shared state (active dataframe) run one by one in submission order
+        self.__serial_pool = ThreadPoolExecutor(max_workers=1)
+        self.__poll_interval = poll_interval
+        self.__done = queue.Queue()
+        self.__latest = {}
+        self.__futures = {}
+        self.__pending = 0
+        self.__polling = False
+        self.__timings = deque(maxlen=history)
+
+    def submit(self, name: str, function, callback=None, error_callback=None, serial: bool = False) -> int:
+        """ Run function in background then call callback(result) on the tkinter thread
+        :param name: name of the task, older pending task of the same name is cancelled
+        :param function: function to run in background thread (no argument)
+        :param callback: function to call with the result
+        :param error_callback: function to call with the exception raised by function
+        :param serial: run in the serial queue (for tasks that mutate shared state)
+        :return: id of the task
+        """
+        self.cancel(name)
+        task_id = self.__latest.get(name, 0) + 1
+        self.__latest[name] = task_id
+        submitted = time.perf_counter()
+
+        def run():
+            """ Thread worker, put the result into the done queue"""
+            started = time.perf_counter()
+            try:
+                result, error = function(), None
+            except Exception as e:
+                result, error = None, e
+            finished = time.perf_counter()
+            self.__done.put((name, task_id, result, error, callback, error_callback,
+                             started - submitted, finished - started))
+
+        pool = self.__serial_pool if serial else self.__pool
+        self.__futures[name] = pool.submit(run)
+        self.__pending += 1
+        if not self.__polling:
+            self.__polling = True
+            self.__root.after(self.__poll_interval, self.__poll)
+        return task_id
+
+    def cancel(self, name: str) -> None:
+        """ Cancel the task by name, the result of the task will not be delivered"""
+        if name not in self.__latest:
+            return
+        self.__latest[name] += 1
+        future = self.__futures.pop(name, None)
+        if future is not None and future.cancel():
+            self.__pending -= 1
+
+    def is_pending(self, name: str) -> bool:
+        """ Check if task with the given name is waiting for running or running"""
+        future = self.__futures.get(name)
+        return future is not None and not future.done()
+
+    def get_timings(self) -> list:
+        """ Return list of (name, waiting time, running time, cancelled) of the recent tasks in seconds"""
+        return list(self.__timings)
+
+    def shutdown(self) -> None:
+        """ Cancel all tasks that not started and stop the thread pools"""
+        self.__pool.shutdown(wait=False, cancel_futures=True)
+        self.__serial_pool.shutdown(wait=False, cancel_futures=True)
+
+    def __poll(self) -> None:
+        """ Deliver the finished tasks to their callbacks (on tkinter thread)"""
+        try:
+            while not self.__done.empty():
+                name, task_id, result, error, callback, error_callback, wait, run = self.__done.get()
+                self.__pending -= 1
+                stale = self.__latest.get(name) != task_id
+                self.__timings.append((name, wait, run, stale))
+                logger.info("Task %s waited %.3f s, ran %.3f s%s", name, wait, run, " (cancelled)" if stale else "")
+                if stale:
+                    continue
+                self.__futures.pop(name, None)
+                if error is not None:
+                    if error_callback is None:
+                        raise error
+                    error_callback(error)
+                elif callback is not None:
+                    callback(result)
+        finally:
+            if self.__pending > 0:
+                self.__root.after(self.__poll_interval, self.__poll)
+            else:
+                self.__polling = False
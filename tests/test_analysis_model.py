@@ -0,0 +1,21 @@
+""" Tests of the analysis model"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from analysis_model import Analysis
+
+
+@pytest.mark.parametrize('rows, size, distribution', [
+    (100000, 20000, 'lognormal'),
+    (100000, 7, 'lognormal'),
+    # about 7 points in each of the 20 x 20 cells, the share of each cell is rounded (509 points before the trim)
+    (3000, 500, 'uniform'),
+])
+def test_sample_scatter_returns_at_most_size_points(rows, size, distribution):
+    rng = np.random.default_rng(0)
+    x = rng.lognormal(size=rows) if distribution == 'lognormal' else rng.uniform(size=rows)
+    df = pd.DataFrame({'x': x, 'y': rng.uniform(size=rows)})
+    sample = Analysis.sample_scatter(df, 'x', 'y', size)
+    assert 0.9 * size <= len(sample) <= size
+    assert not sample.index.duplicated().any()
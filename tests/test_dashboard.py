@@ -0,0 +1,33 @@
+""" Tests of the information page cache"""
+
+import pickle
+import pytest
+from dashboard import DASHBOARD_SUFFIX, Dashboard
+
+
+def test_artifacts_are_read_back(tmp_path):
+    filename = str(tmp_path / 'games.csv')
+    Dashboard(filename, 'hash', 'reduced').get('total', lambda: 42)
+    assert Dashboard(filename, 'hash', 'reduced').get('total', lambda: 0) == 42
+    assert Dashboard(filename, 'hash', 'full').get('total', lambda: 0) == 0
+    assert Dashboard(filename, 'other', 'reduced').get('total', lambda: 0) == 0
+
+
+@pytest.mark.parametrize('content', [pickle.dumps([1, 2]), pickle.dumps('text'), pickle.dumps(None),
+                                     pickle.dumps({'version': 'x'}), b'not a pickle', b''])
+def test_unreadable_cache_is_ignored(tmp_path, content):
+    filename = str(tmp_path / 'games.csv')
+    with open(filename + DASHBOARD_SUFFIX, 'wb') as f:
+        f.write(content)
+    assert Dashboard(filename, 'hash', 'reduced').get('total', lambda: 42) == 42
+
+
+def test_cache_of_other_pandas_version_is_ignored(tmp_path):
+    filename = str(tmp_path / 'games.csv')
+    Dashboard(filename, 'hash', 'reduced').get('total', lambda: 42)
+    with open(filename + DASHBOARD_SUFFIX, 'rb') as f:
+        data = pickle.load(f)
+    data['pandas'] = '0.0.0'
+    with open(filename + DASHBOARD_SUFFIX, 'wb') as f:
+        pickle.dump(data, f)
+    assert Dashboard(filename, 'hash', 'reduced').get('total', lambda: 0) == 0
@@ -0,0 +1,132 @@
+""" Tests of the dataframe saver module"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import dataframesaver
+from dataframesaver import CACHE_META_SUFFIX, CACHE_SUFFIX, DataFrameSaver, read_cache, to_datetime, \
+    to_datetime_column, write_cache
+
+
+def test_to_datetime_column_matches_per_row_parse():
+    dates = pd.Series(['Jan 3, 2010', 'Feb 2019', np.nan, 'Mar 15, 2021', 'Dec 2008', 'Oct 31, 1999', None])
+    expected = pd.Series([to_datetime(i) for i in dates], dtype='datetime64[ns]')
+    result = to_datetime_column(dates)
+    pd.testing.assert_series_equal(result.astype('datetime64[ns]'), expected, check_names=False)
+
+
+@pytest.fixture
+def cached_csv(tmp_path):
+    """ Small csv with a valid dataset cache next to it"""
+    filename = str(tmp_path / 'games.csv')
+    df = pd.DataFrame({'AppID': ['10', '20'], 'Price': [4.57, 0.0]})
+    df.to_csv(filename, index=False)
+    write_cache(filename, df, 'reduced')
+    return filename
+
+
+def test_read_cache_returns_written_dataframe(cached_csv):
+    pd.testing.assert_frame_equal(read_cache(cached_csv, 'reduced'),
+                                  pd.DataFrame({'AppID': ['10', '20'], 'Price': [4.57, 0.0]}))
+    assert read_cache(cached_csv, 'full') is None
+
+
+@pytest.mark.parametrize('content', [b'not a pickle', b'\x80\x04\x95', b'cnot_a_module\nthing\n.'])
+def test_read_cache_ignores_corrupted_pickle(cached_csv, content):
+    with open(cached_csv + CACHE_SUFFIX, 'wb') as f:
+        f.write(content)
+    assert read_cache(cached_csv, 'reduced') is None
+
+
+def test_read_cache_ignores_other_pandas_version(cached_csv):
+    with open(cached_csv + CACHE_META_SUFFIX) as f:
+        meta = json.load(f)
+    meta['pandas'] = '0.0.0'
+    with open(cached_csv + CACHE_META_SUFFIX, 'w') as f:
+        json.dump(meta, f)
+    assert read_cache(cached_csv, 'reduced') is None
+
+
+@pytest.fixture
+def saver(tmp_path, monkeypatch):
+    """ DataFrameSaver of a small dataset, saved directory in the temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({'AppID': [10, 20, 30], 'Name': ['A', 'B', 'C'], 'Price': [4.57, 0.0, 1.5],
+                  'Release date': ['Jan 3, 2010', 'Feb 2019', 'Mar 15, 2021'],
+                  'About the game': ['Long text'] * 3}).to_csv('games.csv', index=False)
+    saver = DataFrameSaver('games.csv')
+    yield saver
+    saver.shutdown()
+
+
+def test_failed_write_is_reported_and_saved_again(saver, monkeypatch):
+    write_saved = dataframesaver.write_saved
+
+    def fail(path, compact):
+        raise OSError('disk full')
+
+    saver.df = saver.get_raw().iloc[:2]
+    saver.save_df('cheap')
+    monkeypatch.setattr(dataframesaver, 'write_saved', fail)
+    saver.save_all_df()
+    assert [str(i) for i in saver.flush()] == ['disk full']
+    assert not os.path.exists(os.path.join('saved', 'cheap.pkl'))
+    monkeypatch.setattr(dataframesaver, 'write_saved', write_saved)
+    saver.save_all_df()
+    assert saver.flush() == []
+    assert pd.read_pickle(os.path.join('saved', 'cheap.pkl'))['AppID'].tolist() == ['10', '20']
+
+
+def test_failed_journal_append_keeps_added_rows(saver, monkeypatch):
+    append_journal = dataframesaver.append_journal
+
+    def fail(path, appid):
+        raise OSError('disk full')
+
+    saver.df = saver.get_raw().iloc[:1]
+    saver.save_df('picked')
+    saver.save_all_df()
+    assert saver.flush() == []
+    monkeypatch.setattr(dataframesaver, 'append_journal', fail)
+    saver.add_to_saved_df(saver.get_by_appid('20'), 'picked')
+    saver.save_all_df()
+    assert len(saver.flush()) == 1
+    saver.add_to_saved_df(saver.get_by_appid('30'), 'picked')
+    monkeypatch.setattr(dataframesaver, 'append_journal', append_journal)
+    saver.save_all_df()
+    assert saver.flush() == []
+    assert dataframesaver.read_journal(os.path.join('saved', 'picked.pkl')) == ['20', '30']
+
+
+def test_load_missing_saved_file_raises_key_error(saver):
+    saver.df = saver.get_raw().iloc[:1]
+    saver.save_df('gone')
+    saver.save_all_df()
+    assert saver.shutdown() == []
+    os.remove(os.path.join('saved', 'gone.pkl'))
+    other = DataFrameSaver('games.csv')
+    with pytest.raises(KeyError):
+        other.load_df('gone')
+    other.shutdown()
+
+
+def test_legacy_saved_csv_keeps_only_derived_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = pd.DataFrame({'AppID': [10, 20, 30], 'Name': ['A', 'B', 'C'], 'Price': [4.57, 0.0, 1.5],
+                            'Release date': ['Jan 3, 2010', 'Feb 2019', 'Mar 15, 2021'],
+                            'About the game': ['Long text'] * 3})
+    dataset.to_csv('games.csv', index=False)
+    os.makedirs('saved')
+    # saved by older version with every dataset column (and the index)
+    dataset.iloc[:2].assign(Rating=[50.0, 75.0]).to_csv(os.path.join('saved', 'legacy.csv'))
+    saver = DataFrameSaver('games.csv', 'reduced')
+    assert 'About the game' not in saver.get_raw().columns
+    saver.load_df('legacy')
+    assert 'About the game' not in saver.df.columns
+    assert saver.df['Rating'].tolist() == [50.0, 75.0]
+    saver.add_to_saved_df(saver.get_by_appid('30'), 'legacy')
+    saver.save_all_df()
+    assert saver.shutdown() == []
+    assert pd.read_pickle(os.path.join('saved', 'legacy.pkl')).columns.tolist() == ['AppID', 'Rating']
@@ -0,0 +1,128 @@
+""" Tests of the image service against a local HTTP server"""
+
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import pytest
+import requests
+from PIL import Image
+from image_service import ImageService
+
+
+def png(color: str) -> bytes:
+    """ Encode a small png image of the color"""
+    buffer = BytesIO()
+    Image.new('RGB', (46, 21), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def server():
+    """ Local HTTP server of png images (/<color>.png or /x<rrggbb>.png, 404 for /missing.png), counts the requests by path
+    and waits server.delay seconds before each response"""
+    requests_count = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_count[self.path] += 1
+            time.sleep(httpd.delay)
+            if self.path == '/missing.png':
+                self.send_error(404)
+                return
+            color = self.path.strip('/').removesuffix('.png')
+            body = png('#' + color[1:] if color.startswith('x') else color)
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.delay = 0
+    httpd.requests = requests_count
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def service(tmp_path):
+    images = ImageService(str(tmp_path / 'images'), max_workers=2)
+    yield images
+    images.shutdown()
+
+
+def wait_idle(service: ImageService, urls: list) -> None:
+    """ Wait until the prefetch of the urls are finished"""
+    for url in urls:
+        service.get(url)
+
+
+def test_memory_cache_hit(server, service):
+    url = server.url + '/red.png'
+    first = service.get(url)
+    assert service.get(url) is first
+    assert server.requests['/red.png'] == 1
+
+
+def test_disk_cache_hit_after_clear(server, service):
+    url = server.url + '/green.png'
+    service.get(url)
+    service.clear()
+    image = service.get(url)
+    assert image.size == (46, 21)
+    assert server.requests['/green.png'] == 1
+
+
+def test_prefetch_dedupe(server, service):
+    server.delay = 0.1
+    urls = [server.url + '/blue.png', server.url + '/blue.png', server.url + '/white.png']
+    service.prefetch(urls)
+    service.prefetch(urls[:1])
+    wait_idle(service, urls)
+    assert server.requests['/blue.png'] == 1
+    assert server.requests['/white.png'] == 1
+
+
+def test_http_error_raised(server, service):
+    with pytest.raises(requests.HTTPError):
+        service.get(server.url + '/missing.png')
+
+
+def test_get_then_prefetch_downloads_once(server, service):
+    server.delay = 0.3
+    url = server.url + '/black.png'
+    thread = threading.Thread(target=service.get, args=(url,))
+    thread.start()
+    time.sleep(0.1)
+    service.prefetch([url])
+    thread.join()
+    service.get(url)
+    assert server.requests['/black.png'] == 1
+
+
+def test_get_does_not_wait_for_queued_prefetch(server, service):
+    server.delay = 0.3
+    urls = [f"{server.url}/x{i:06x}.png" for i in range(20)]
+    service.prefetch(urls)
+    start = time.perf_counter()
+    service.get(urls[-1])
+    assert time.perf_counter() - start < 1.5
+    assert server.requests[f"/x{19:06x}.png"] == 1
+
+
+def test_prefetch_cancels_older_queued_prefetch(server, service):
+    server.delay = 0.2
+    old = [f"{server.url}/x{i:06x}.png" for i in range(20)]
+    service.prefetch(old)
+    service.prefetch([server.url + '/yellow.png'])
+    time.sleep(1)
+    assert sum(server.requests.values()) <= 4
@@ -0,0 +1,43 @@
+""" Tests of the ingestion module"""
+
+import numpy as np
+import pandas as pd
+from ingestion import read_dataset
+
+
+def write_dataset(path, rows: int = 1050) -> str:
+    """ Write a small dataset csv, Reviews is a text column that is empty in the first 1000 rows"""
+    pd.DataFrame({
+        'AppID': np.arange(rows) + 10,
+        'Name': [f"Game {i}" for i in range(rows)],
+        'Release date': ['Jan 3, 2010' if i % 2 else 'Feb 2019' for i in range(rows)],
+        'Price': [4.57, 0.0, 19.99, 9.99, 1.5] * (rows // 5),
+        'Positive': np.arange(rows) * 3,
+        'Score rank': [np.nan, 99.0] * (rows // 2),
+        'Reviews': [np.nan] * (rows - 5) + ['Great game'] * 5,
+        'Genres': [['Action', 'Indie', 'RPG', 'Casual', 'Strategy'][i * 5 // rows] for i in range(rows)],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_reduced_mode_skips_sparse_text_column(tmp_path):
+    df = read_dataset(write_dataset(tmp_path / 'games.csv'), 'reduced', chunksize=100)
+    assert 'Reviews' not in df.columns
+    assert {'AppID', 'Name', 'Release date', 'Price', 'Positive', 'Genres'} <= set(df.columns)
+
+
+def test_reduced_mode_keeps_inexact_floats_as_float64(tmp_path):
+    df = read_dataset(write_dataset(tmp_path / 'games.csv'), 'reduced', chunksize=100)
+    assert df['Price'].dtype == np.float64
+    assert df['Price'].iloc[0] == 4.57
+    assert df['Score rank'].dtype == np.float32
+    assert df['Positive'].dtype == np.int32
+
+
+def test_reduced_mode_combines_chunk_categories(tmp_path):
+    df = read_dataset(write_dataset(tmp_path / 'games.csv'), 'reduced', chunksize=100)
+    full = read_dataset(str(tmp_path / 'games.csv'), 'full')
+    assert isinstance(df['Genres'].dtype, pd.CategoricalDtype)
+    assert set(df['Genres'].cat.categories) == {'Action', 'Indie', 'RPG', 'Casual', 'Strategy'}
+    assert df['Genres'].astype(str).tolist() == full['Genres'].tolist()
+    assert list(df.columns) == [i for i in full.columns if i in df.columns]
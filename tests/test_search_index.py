@@ -0,0 +1,64 @@
+""" Tests of the search index"""
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from search_index import CACHE_SIZE, SearchIndex
+
+WORDS = ['dark', 'souls', 'so', 'space', 'war', 'craft', 'the', 'legend', 'héros', '日本', 'sky', 'darkest']
+
+
+def build_index(rows: int = 5000) -> SearchIndex:
+    """ Search index of games named "Game <i> Title" with AppID i"""
+    return SearchIndex(pd.Series(np.arange(rows)), pd.Series([f"Game {i} Title" for i in range(rows)]))
+
+
+@pytest.fixture(scope='module')
+def games() -> pd.DataFrame:
+    """ Games named with random words (some without name), AppID not in row order"""
+    rng = np.random.default_rng(0)
+    names = [' '.join(rng.choice(WORDS, rng.integers(1, 4))) for _ in range(3000)]
+    names[10] = None
+    names[11] = 'Dark'
+    return pd.DataFrame({'AppID': rng.permutation(np.arange(3000)) * 7, 'Name': names})
+
+
+def reference_search(games: pd.DataFrame, query: str) -> list:
+    """ Rank every row with str.find, exact match first, then match position, name length and row"""
+    query = query.lower()
+    ranked = []
+    for row, (appid, name) in enumerate(zip(games['AppID'].astype(str), games['Name'].fillna('').str.lower())):
+        keys = [(i.find(query) != 0 or len(i) != len(query), i.find(query), len(name), row)
+                for i in (name, appid) if query in i]
+        if keys:
+            ranked.append(min(keys))
+    return [i[-1] for i in sorted(ranked)]
+
+
+@pytest.mark.parametrize('query', ['d', 'so', 'DAR', 'dark', 'ark so', 'dark souls', 'souls so', '日本', 'é',
+                                   '7', '14', '217', 'darkest war', 'xyz', 'darkx'])
+@pytest.mark.parametrize('limit', [None, 1000, 5, 1, 0])
+def test_search_matches_reference(games, query, limit):
+    index = SearchIndex(games['AppID'], games['Name'])
+    expected = reference_search(games, query)
+    assert index.search(query, limit).tolist() == expected[:limit]
+
+
+def test_narrowed_search_matches_new_search(games):
+    index = SearchIndex(games['AppID'], games['Name'])
+    for i in range(1, len('dark souls') + 1):
+        index.search('dark souls'[:i])
+    assert index.search('dark souls').tolist() == reference_search(games, 'dark souls')
+    assert index.search('darks').tolist() == reference_search(games, 'darks')
+
+
+def test_concurrent_search_matches_serial_search():
+    queries = [str(i) for i in range(3 * CACHE_SIZE)] * 3
+    reference = build_index()
+    expected = [reference.search(i) for i in queries]
+    index = build_index()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(index.search, queries))
+    for query, result, rows in zip(queries, results, expected):
+        np.testing.assert_array_equal(result, rows, err_msg=query)
@@ -0,0 +1,135 @@
+""" Virtual treeview module for GUI application
+treeview that only materializes the visible rows of a large table"""
+
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+
+
+class VirtualTreeview(ttk.Treeview):
+    """ Treeview backed by a numpy array, only the visible rows are inserted into the widget
+    so loading and scrolling cost the same regardless of the number of rows"""
+
+    def __init__(self, master=None, yscrollcommand=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.__data = np.empty((0, 0), dtype=object)
+        self.__start = 0
+        self.__page = int(self['height'])
+        self.__selected = None
+        self.__scroll_command = yscrollcommand
+        self.bind('<Configure>', lambda x: self.__fit_page(), add='+')
+        self.bind('<MouseWheel>', self.__on_wheel, add='+')
+        self.bind('<Button-4>', lambda x: self.__scroll_by(-3), add='+')
+        self.bind('<Button-5>', lambda x: self.__scroll_by(3), add='+')
+        self.bind('<Up>', lambda x: self.__move_focus(-1), add='+')
+        self.bind('<Down>', lambda x: self.__move_focus(1), add='+')
+
+    def set_data(self, data: np.ndarray) -> None:
+        """ Replace the table content, data is 2d array of the row values (in columns order)"""
+        self.delete(*self.get_children())
+        self.__data = data
+        self.__start = 0
+        self.__selected = None
+        self.__render()
+
+    def clear(self) -> None:
+        """ Remove all rows from the table"""
+        self.set_data(np.empty((0, len(self['columns'])), dtype=object))
+
+    def selected_values(self) -> (np.ndarray, None):
+        """ Return the values of the selected row (None if no row is selected)"""
+        selection = self.selection()
+        if not selection:
+            return None
+        return self.__data[int(selection[0])]
+
+    def nearby_values(self, distance: int) -> np.ndarray:
+        """ Return the values of the rows within distance of the selected row (empty if no row is selected)"""
+        selection = self.selection()
+        if not selection:
+            return self.__data[:0]
+        row = int(selection[0])
+        return self.__data[max(0, row - distance):row + distance + 1]
+
+    def __len__(self):
+        return len(self.__data)
+
+    def yview(self, *args):
+        """ Scroll the table by rows (called by the scrollbar)"""
+        if not args:
+            return self.__fraction()
+        if args[0] == 'moveto':
+            self.__scroll_to(int(float(args[1]) * len(self.__data)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.__page
+            self.__scroll_by(amount)
+        return None
+
+    def __fraction(self) -> (float, float):
+        """ Return the fraction of the first and last visible rows (scrollbar position)"""
+        n = len(self.__data)
+        if n == 0:
+            return 0.0, 1.0
+        return self.__start / n, min(n, self.__start + self.__page) / n
+
+    def __on_wheel(self, e: tk.Event):
+        """ Scroll the table according to mouse wheel event"""
+        step = int(-e.delta / 120) or (-1 if e.delta > 0 else 1)
+        return self.__scroll_by(3 * step)
+
+    def __scroll_by(self, amount: int):
+        """ Scroll the table by number of rows"""
+        self.__scroll_to(self.__start + amount)
+        return 'break'
+
+    def __scroll_to(self, start: int) -> None:
+        """ Scroll the table so the given row is the first visible row"""
+        start = max(0, min(start, len(self.__data) - self.__page))
+        if start != self.__start:
+            self.__start = start
+            self.__render()
+
+    def __move_focus(self, step: int):
+        """ Move the selection by step rows, scroll the table if the row is not visible"""
+        focus = self.focus()
+        if focus == '':
+            return None
+        row = int(focus) + step
+        if not 0 <= row < len(self.__data):
+            return 'break'
+        if not self.__start <= row < self.__start + self.__page:
+            self.__scroll_to(self.__start + step)
+        self.selection_set(str(row))
+        self.focus(str(row))
+        return 'break'
+
+    def __fit_page(self) -> None:
+        """ Recalculate the number of visible rows from the widget height and the row height"""
+        children = self.get_children()
+        if not children:
+            return
+        bbox = self.bbox(children[0])
+        if not bbox:
+            return
+        page = max(1, (self.winfo_height() - bbox[1]) // bbox[3])
+        if page != self.__page:
+            self.__page = page
+            self.__start = max(0, min(self.__start, len(self.__data) - self.__page))
+            self.__render()
+
+    def __render(self) -> None:
+        """ Insert the visible rows into the widget (item id is the row position in data)"""
+        selection = self.selection()
+        if selection:
+            self.__selected = int(selection[0])
+        self.delete(*self.get_children())
+        end = min(len(self.__data), self.__start + self.__page)
+        for i in range(self.__start, end):
+            self.insert('', tk.END, iid=str(i), values=self.__data[i].tolist())
+        if self.__selected is not None and self.__start <= self.__selected < end:
+            self.selection_set(str(self.__selected))
+            self.focus(str(self.__selected))
+        if self.__scroll_command is not None:
+            self.__scroll_command(*self.__fraction())